@@ -0,0 +1,152 @@
+import datetime
+import os
+
+from database import Database
+
+schema = """
+CREATE TABLE IF NOT EXISTS sources (
+    source TEXT PRIMARY KEY,
+    title TEXT,
+    language TEXT,
+    cue_count INTEGER,
+    runtime_ms INTEGER,
+    content_hash TEXT,
+    mtime REAL,
+    size INTEGER,
+    updated TEXT
+);
+CREATE TABLE IF NOT EXISTS outputs (
+    source TEXT,
+    output TEXT,
+    format TEXT,
+    updated TEXT,
+    PRIMARY KEY (source, output)
+);
+CREATE INDEX IF NOT EXISTS sources_title ON sources (title);
+CREATE INDEX IF NOT EXISTS sources_language ON sources (language);
+CREATE INDEX IF NOT EXISTS outputs_format ON outputs (format);
+"""
+
+
+class Catalog(Database):
+    schema = schema
+    files_table = "sources"
+    path_column = "source"
+
+    def _merge(self):
+        self.conn.execute("INSERT OR REPLACE INTO sources SELECT * FROM other.sources")
+        self.conn.execute("INSERT OR REPLACE INTO outputs SELECT * FROM other.outputs")
+
+    def update_source(self, source_file, title, language, cues, content_hash):
+        stat = os.stat(source_file)
+        cue_count = 0
+        runtime_ms = 0
+        for _, end, _ in cues:
+            cue_count += 1
+            runtime_ms = max(runtime_ms, end)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.key(source_file),
+                    title,
+                    language,
+                    cue_count,
+                    runtime_ms,
+                    content_hash,
+                    stat.st_mtime,
+                    stat.st_size,
+                    _now(),
+                ),
+            )
+
+    def add_output(self, source_file, output_file, _format):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?)",
+                (
+                    self.key(source_file),
+                    self.key(output_file),
+                    _format,
+                    _now(),
+                ),
+            )
+
+    def rename(self, source_file, new_file, language):
+        source = self.key(source_file)
+        new_source = self.key(new_file)
+        with self.conn:
+            self.conn.execute(
+                "UPDATE OR REPLACE sources SET source = ?, language = ? WHERE source = ?",
+                (new_source, language, source),
+            )
+            self.conn.execute(
+                "UPDATE OR REPLACE outputs SET source = ? WHERE source = ?",
+                (new_source, source),
+            )
+
+    def remove(self, source_file):
+        source = self.key(source_file)
+        with self.conn:
+            self.conn.execute("DELETE FROM sources WHERE source = ?", (source,))
+            self.conn.execute("DELETE FROM outputs WHERE source = ?", (source,))
+
+    def query(self, title=None, language=None, _format=None):
+        conditions = []
+        params = []
+        if title:
+            conditions.append("sources.title LIKE ?")
+            params.append(f"%{title}%")
+        if language:
+            conditions.append("sources.language = ?")
+            params.append(language)
+        if _format:
+            conditions.append(
+                "EXISTS (SELECT 1 FROM outputs o"
+                " WHERE o.source = sources.source AND o.format = ?)"
+            )
+            params.append(_format)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.conn.execute(
+            f"""
+            SELECT sources.source, title, language, cue_count, runtime_ms,
+                   content_hash, outputs.output, outputs.format
+            FROM sources LEFT JOIN outputs ON outputs.source = sources.source
+            {where}
+            ORDER BY title, sources.source
+            """,
+            params,
+        ).fetchall()
+
+        entries = {}
+        for (
+            source,
+            title,
+            language,
+            cue_count,
+            runtime_ms,
+            content_hash,
+            output,
+            fmt,
+        ) in rows:
+            entry = entries.setdefault(
+                source,
+                {
+                    "source": self.resolve(source),
+                    "title": title,
+                    "language": language,
+                    "cue_count": cue_count,
+                    "runtime_ms": runtime_ms,
+                    "content_hash": content_hash,
+                    "outputs": [],
+                },
+            )
+            if output:
+                entry["outputs"].append(
+                    {"format": fmt, "output": self.resolve(output)}
+                )
+        return list(entries.values())
+
+
+def _now():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,125 @@
+import array
+import json
+import mmap
+import struct
+import sys
+
+magic = b"STCUE\x00\x00\x01"
+# magic, 元数据长度, 字幕条数, 去重后的文本条数, 文本区长度
+header = struct.Struct("<8sIIII")
+
+
+# 按列存储的字幕：时间轴与文本编号存在 int 数组中，文本去重后拼接成一段 utf-8
+class CueStore:
+    __slots__ = ("meta", "starts", "ends", "text_ids", "offsets", "blob", "buffer")
+
+    def __init__(self, meta, starts, ends, text_ids, offsets, blob, buffer=None):
+        self.meta = meta
+        self.starts = starts
+        self.ends = ends
+        self.text_ids = text_ids
+        self.offsets = offsets
+        self.blob = blob
+        self.buffer = buffer
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # 先释放指向映射的视图，才能关闭 mmap
+        if self.buffer is None:
+            return
+        for column in (self.starts, self.ends, self.text_ids, self.offsets, self.blob):
+            if isinstance(column, memoryview):
+                column.release()
+        self.buffer.close()
+        self.buffer = None
+
+    @classmethod
+    def from_cues(cls, cues, meta=None):
+        starts = array.array("i")
+        ends = array.array("i")
+        text_ids = array.array("i")
+        offsets = array.array("i", [0])
+        interned = {}
+        chunks = []
+        for start, end, text in cues:
+            text_id = interned.get(text)
+            if text_id is None:
+                text_id = interned[text] = len(interned)
+                chunk = text.encode("utf-8")
+                chunks.append(chunk)
+                offsets.append(offsets[-1] + len(chunk))
+            starts.append(start)
+            ends.append(end)
+            text_ids.append(text_id)
+        return cls(meta or {}, starts, ends, text_ids, offsets, b"".join(chunks))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        return self.starts[index], self.ends[index], self.text(self.text_ids[index])
+
+    def __iter__(self):
+        for index in range(len(self.starts)):
+            yield self[index]
+
+    def text(self, text_id):
+        return str(self.blob[self.offsets[text_id] : self.offsets[text_id + 1]], "utf-8")
+
+    def save(self, path):
+        meta = json.dumps(self.meta, ensure_ascii=False).encode("utf-8")
+        # 元数据补齐到 4 字节，保证后面的 int 列对齐
+        meta += b" " * (-len(meta) % 4)
+        with open(path, "wb") as file:
+            file.write(
+                header.pack(
+                    magic, len(meta), len(self.starts), len(self.offsets) - 1, len(self.blob)
+                )
+            )
+            file.write(meta)
+            for column in (self.starts, self.ends, self.text_ids, self.offsets):
+                if sys.byteorder == "big":
+                    column = array.array("i", column)
+                    column.byteswap()
+                file.write(column.tobytes())
+            file.write(self.blob)
+
+    @classmethod
+    def load(cls, path):
+        # 列和文本区都是映射上的视图，只有访问到的部分才会从磁盘读入，
+        # 用完后需要 close 或放在 with 语句中
+        with open(path, "rb") as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(data)
+        columns = []
+        try:
+            file_magic, meta_len, cue_count, text_count, blob_len = header.unpack_from(
+                view
+            )
+            if file_magic != magic:
+                raise ValueError(f"{path} 不是有效的字幕列存文件")
+            position = header.size
+            meta = json.loads(bytes(view[position : position + meta_len]))
+            position += meta_len
+            for count in (cue_count, cue_count, cue_count, text_count + 1):
+                column = view[position : position + count * 4].cast("i")
+                if sys.byteorder == "big":
+                    column = array.array("i", column)
+                    column.byteswap()
+                columns.append(column)
+                position += count * 4
+            blob = view[position : position + blob_len]
+        except Exception:
+            for column in columns:
+                if isinstance(column, memoryview):
+                    column.release()
+            view.release()
+            data.close()
+            raise
+        view.release()
+        return cls(meta, *columns, blob, data)
@@ -0,0 +1,79 @@
+import os
+import sqlite3
+
+
+def library_key(path, root=None):
+    # 路径按相对于字幕库根目录的形式记录，各台机器把共享存储挂载在不同位置时，
+    # 同一文件在各分片的目录和索引中仍是同一个键
+    root = os.path.abspath(root or os.getcwd())
+    try:
+        key = os.path.relpath(os.path.abspath(path), root)
+    except ValueError:
+        # Windows 下跨盘符无法取相对路径，只能记录绝对路径
+        return os.path.abspath(path)
+    return key.replace(os.sep, "/")
+
+
+def library_path(key, root=None):
+    root = os.path.abspath(root or os.getcwd())
+    return os.path.normpath(os.path.join(root, key))
+
+
+# 目录和索引共用的 SQLite 封装。子类提供 schema，以及以源文件路径为主键、
+# 带 mtime 和 size 列的表 files_table / path_column
+class Database:
+    schema = ""
+    files_table = None
+    path_column = None
+
+    def __init__(self, path, root=None):
+        self.path = path
+        self.root = root
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.executescript(self.schema)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def key(self, path):
+        return library_key(path, self.root)
+
+    def resolve(self, key):
+        return library_path(key, self.root)
+
+    def contains(self, source_file):
+        # 主键等值查询，可以走索引
+        return (
+            self.conn.execute(
+                f"SELECT 1 FROM {self.files_table} WHERE {self.path_column} = ?",
+                (self.key(source_file),),
+            ).fetchone()
+            is not None
+        )
+
+    def is_fresh(self, source_file):
+        # 文件大小和修改时间都未变化时无需重新处理
+        stat = os.stat(source_file)
+        row = self.conn.execute(
+            f"SELECT mtime, size FROM {self.files_table} WHERE {self.path_column} = ?",
+            (self.key(source_file),),
+        ).fetchone()
+        return row is not None and row[0] == stat.st_mtime and row[1] == stat.st_size
+
+    def merge(self, path):
+        # 合并其他库（如各分片的目录或索引）中的记录，同一文件以后者为准
+        self.conn.execute("ATTACH DATABASE ? AS other", (path,))
+        try:
+            with self.conn:
+                self._merge()
+        finally:
+            self.conn.execute("DETACH DATABASE other")
+
+    def _merge(self):
+        raise NotImplementedError
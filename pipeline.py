@@ -0,0 +1,90 @@
+import queue
+import threading
+
+_end = object()
+
+
+class Stage:
+    __slots__ = ("name", "func", "workers")
+
+    def __init__(self, name, func, workers=1):
+        self.name = name
+        self.func = func
+        self.workers = workers
+
+
+# 多阶段流水线：相邻阶段之间用有界队列连接，每个阶段有各自的线程数。
+# 下游处理不过来时 put 会阻塞上游，内存中同时存在的任务数因此有上限。
+class Pipeline:
+    def __init__(self, stages, queue_size=8):
+        self.stages = stages
+        self.queue_size = queue_size
+
+    def run(self, items, on_result=None, on_error=None):
+        queues = [
+            queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)
+        ]
+        threads = [
+            threading.Thread(target=self._feed, args=(items, queues[0]), daemon=True)
+        ]
+        for index, stage in enumerate(self.stages):
+            remaining = [stage.workers]
+            lock = threading.Lock()
+            threads.extend(
+                threading.Thread(
+                    target=self._work,
+                    args=(stage, queues[index], queues[index + 1], remaining, lock),
+                    daemon=True,
+                )
+                for _ in range(stage.workers)
+            )
+        for thread in threads:
+            thread.start()
+
+        # 结果在调用线程中回调，进度条和断点只在这里更新
+        while True:
+            job = queues[-1].get()
+            if job is _end:
+                break
+            if isinstance(job, _Failure):
+                if on_error:
+                    on_error(job.job, job.stage, job.error)
+            elif on_result:
+                on_result(job)
+
+        for thread in threads:
+            thread.join()
+
+    def _feed(self, items, output):
+        for item in items:
+            output.put(item)
+        output.put(_end)
+
+    def _work(self, stage, input, output, remaining, lock):
+        while True:
+            job = input.get()
+            if job is _end:
+                # 让同阶段的其他线程也能收到结束标记，最后一个退出的线程通知下游
+                input.put(_end)
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    output.put(_end)
+                return
+            if isinstance(job, _Failure):
+                output.put(job)
+                continue
+            try:
+                output.put(stage.func(job))
+            except Exception as e:
+                output.put(_Failure(job, stage.name, e))
+
+
+class _Failure:
+    __slots__ = ("job", "stage", "error")
+
+    def __init__(self, job, stage, error):
+        self.job = job
+        self.stage = stage
+        self.error = error
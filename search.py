@@ -0,0 +1,101 @@
+import os
+
+from database import Database
+
+schema = """
+CREATE TABLE IF NOT EXISTS files (
+    file TEXT PRIMARY KEY,
+    language TEXT,
+    title TEXT,
+    mtime REAL,
+    size INTEGER
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS cues USING fts5(
+    text,
+    file UNINDEXED,
+    start_ms UNINDEXED,
+    end_ms UNINDEXED,
+    tokenize = 'trigram'
+);
+"""
+
+
+class SearchIndex(Database):
+    schema = schema
+    files_table = "files"
+    path_column = "file"
+
+    def _merge(self):
+        self.conn.execute(
+            "DELETE FROM cues WHERE file IN (SELECT file FROM other.files)"
+        )
+        self.conn.execute("INSERT OR REPLACE INTO files SELECT * FROM other.files")
+        self.conn.execute(
+            "INSERT INTO cues (text, file, start_ms, end_ms)"
+            " SELECT text, file, start_ms, end_ms FROM other.cues"
+        )
+
+    def update(self, source_file, language, title, cues):
+        file = self.key(source_file)
+        stat = os.stat(source_file)
+        with self.conn:
+            self.conn.execute("DELETE FROM cues WHERE file = ?", (file,))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                (file, language, title, stat.st_mtime, stat.st_size),
+            )
+            self.conn.executemany(
+                "INSERT INTO cues (text, file, start_ms, end_ms) VALUES (?, ?, ?, ?)",
+                [(text, file, start, end) for start, end, text in cues],
+            )
+
+    def rename(self, source_file, new_file, language):
+        file = self.key(source_file)
+        new = self.key(new_file)
+        with self.conn:
+            self.conn.execute("DELETE FROM cues WHERE file = ?", (new,))
+            self.conn.execute(
+                "UPDATE OR REPLACE files SET file = ?, language = ? WHERE file = ?",
+                (new, language, file),
+            )
+            self.conn.execute("UPDATE cues SET file = ? WHERE file = ?", (new, file))
+
+    def remove(self, source_file):
+        file = self.key(source_file)
+        with self.conn:
+            self.conn.execute("DELETE FROM cues WHERE file = ?", (file,))
+            self.conn.execute("DELETE FROM files WHERE file = ?", (file,))
+
+    def search(self, query, limit=20):
+        # trigram 分词器至少需要 3 个字符，更短的查询退化为逐条匹配
+        if len(query) >= 3:
+            rows = self.conn.execute(
+                """
+                SELECT cues.file, files.language, files.title,
+                       cues.start_ms, cues.end_ms, cues.text
+                FROM cues JOIN files ON files.file = cues.file
+                WHERE cues MATCH ? ORDER BY rank LIMIT ?
+                """,
+                ('"' + query.replace('"', '""') + '"', limit),
+            ).fetchall()
+        else:
+            rows = self.conn.execute(
+                """
+                SELECT cues.file, files.language, files.title,
+                       cues.start_ms, cues.end_ms, cues.text
+                FROM cues JOIN files ON files.file = cues.file
+                WHERE instr(cues.text, ?) > 0 LIMIT ?
+                """,
+                (query, limit),
+            ).fetchall()
+        return [
+            {
+                "file": self.resolve(file),
+                "language": language,
+                "title": title,
+                "start_ms": start_ms,
+                "end_ms": end_ms,
+                "text": text,
+            }
+            for file, language, title, start_ms, end_ms, text in rows
+        ]
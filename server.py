@@ -0,0 +1,201 @@
+import json
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+formats = ["md", "docx", "html", "pdf", "txt", "cues"]
+
+
+class Job:
+    __slots__ = ("action", "params", "enqueued", "done", "result", "error")
+
+    def __init__(self, action, params):
+        self.action = action
+        self.params = params
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ToolboxServer:
+    def __init__(self, toolbox, host="127.0.0.1", port=8765, workers=2, queue_size=32):
+        self.toolbox = toolbox
+        self.workers = workers
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.requests = defaultdict(int)
+        self.rejected = 0
+        self.errors = 0
+        self.latencies = defaultdict(lambda: deque(maxlen=1000))
+        self.actions = {
+            "convert": self._convert,
+            "rename": self._rename,
+            "clean": self._clean,
+        }
+        # 各操作的必填参数和可选参数，参数值均为字符串
+        self.params = {
+            "convert": ({"source"}, {"output", "format"}),
+            "rename": ({"source"}, set()),
+            "clean": ({"input"}, set()),
+        }
+        # 服务常驻期间保持静默，并复用浏览器和标题缓存
+        self.toolbox.batch_mode = True
+        self.toolbox.keep_browser()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.threads = [
+            threading.Thread(target=self._work, daemon=True) for _ in range(workers)
+        ]
+
+    @property
+    def address(self):
+        return self.httpd.server_address
+
+    def serve_forever(self):
+        for thread in self.threads:
+            thread.start()
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.httpd.server_close()
+            self.toolbox.quit_browser()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+
+    def submit(self, action, params, timeout=None):
+        job = Job(action, params)
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            with self.lock:
+                self.rejected += 1
+            return None
+        job.done.wait(timeout)
+        return job
+
+    def validate(self, action, params):
+        if not isinstance(params, dict):
+            return "请求体必须是 JSON 对象"
+        required, optional = self.params[action]
+        missing = required - params.keys()
+        if missing:
+            return f"缺少参数: {', '.join(sorted(missing))}"
+        unknown = params.keys() - required - optional
+        if unknown:
+            return f"未知的参数: {', '.join(sorted(unknown))}"
+        for key, value in params.items():
+            if not isinstance(value, str):
+                return f"参数 {key} 必须是字符串"
+        if action == "convert" and params.get("format", "md") not in formats:
+            return f"不支持的文件格式: {params['format']}"
+        return None
+
+    def metrics(self):
+        with self.lock:
+            latency = {}
+            for action, samples in self.latencies.items():
+                ordered = sorted(samples)
+                latency[action] = {
+                    "count": len(ordered),
+                    "avg": round(sum(ordered) / len(ordered), 2),
+                    "p50": ordered[len(ordered) // 2],
+                    "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                    "max": ordered[-1],
+                }
+            return {
+                "queue_depth": self.jobs.qsize(),
+                "queue_size": self.jobs.maxsize,
+                "workers": self.workers,
+                "active": self.active,
+                "requests": dict(self.requests),
+                "rejected": self.rejected,
+                "errors": self.errors,
+                "latency_ms": latency,
+            }
+
+    def _work(self):
+        while True:
+            job = self.jobs.get()
+            with self.lock:
+                self.active += 1
+            try:
+                job.result = self.actions[job.action](**job.params)
+            except Exception as e:
+                job.error = str(e)
+            finally:
+                # 延迟包含排队时间，即客户端实际等待的时间
+                elapsed = round((time.perf_counter() - job.enqueued) * 1000, 2)
+                with self.lock:
+                    self.active -= 1
+                    self.requests[job.action] += 1
+                    self.latencies[job.action].append(elapsed)
+                    if job.error:
+                        self.errors += 1
+                job.done.set()
+                self.jobs.task_done()
+
+    def _convert(self, source, output=None, format="md"):
+        target_file = self.toolbox.convert(source, output, format)
+        if not target_file:
+            raise RuntimeError(f"转换文件 {source} 失败")
+        return {"output": target_file}
+
+    def _rename(self, source):
+        return {"filename": self.toolbox.rename(source)}
+
+    def _clean(self, input):
+        return {"removed": self.toolbox.clean_folder(input)}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    self._reply(200, server.metrics())
+                elif self.path == "/health":
+                    self._reply(200, {"status": "ok"})
+                else:
+                    self._reply(404, {"error": f"未知的路径: {self.path}"})
+
+            def do_POST(self):
+                action = self.path.strip("/")
+                if action not in server.actions:
+                    self._reply(404, {"error": f"未知的操作: {action}"})
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    params = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError as e:
+                    self._reply(400, {"error": f"请求格式错误: {str(e)}"})
+                    return
+                # 参数错误在入队前直接返回 400，不计入服务端错误
+                error = server.validate(action, params)
+                if error:
+                    self._reply(400, {"error": error})
+                    return
+
+                job = server.submit(action, params)
+                if job is None:
+                    self._reply(503, {"error": "队列已满，请稍后重试"})
+                elif job.error:
+                    self._reply(500, {"error": job.error})
+                else:
+                    self._reply(200, job.result)
+
+            def _reply(self, status, body):
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,92 @@
+import unittest
+
+from toolbox import Toolbox
+
+
+def track(texts, offset=0, length=2000):
+    return [
+        (i * length + offset, (i + 1) * length + offset, text)
+        for i, text in enumerate(texts)
+    ]
+
+
+class AlignCuesTest(unittest.TestCase):
+    def setUp(self):
+        self.toolbox = Toolbox()
+        self.chinese = track([f"中{i}" for i in range(6)])
+
+    def test_exact(self):
+        rows = self.toolbox._align_cues(
+            self.chinese, track([f"en{i}" for i in range(6)])
+        )
+        self.assertEqual(rows, [([f"中{i}"], [f"en{i}"]) for i in range(6)])
+
+    def test_offset(self):
+        # 两路字幕有固定偏移时仍然逐行对应，不会串成一整行
+        for offset in (100, -100, 900):
+            rows = self.toolbox._align_cues(
+                self.chinese, track([f"en{i}" for i in range(6)], offset)
+            )
+            self.assertEqual(
+                rows, [([f"中{i}"], [f"en{i}"]) for i in range(6)], offset
+            )
+
+    def test_one_row_per_chinese_cue(self):
+        english = [(0, 5000, "long"), (5000, 6000, "short")]
+        rows = self.toolbox._align_cues(self.chinese, english)
+        self.assertEqual(
+            rows,
+            [
+                (["中0"], ["long"]),
+                (["中1"], []),
+                (["中2"], ["short"]),
+                (["中3"], []),
+                (["中4"], []),
+                (["中5"], []),
+            ],
+        )
+
+    def test_gap(self):
+        chinese = [(0, 1000, "中0"), (5000, 6000, "中1")]
+        english = [
+            (0, 1000, "en0"),
+            (2000, 3000, "gap1"),
+            (3000, 4000, "gap2"),
+            (5000, 6000, "en1"),
+            (7000, 8000, "tail"),
+        ]
+        rows = self.toolbox._align_cues(chinese, english)
+        self.assertEqual(
+            rows,
+            [
+                (["中0"], ["en0"]),
+                ([], ["gap1", "gap2"]),
+                (["中1"], ["en1"]),
+                ([], ["tail"]),
+            ],
+        )
+
+    def test_empty_secondary(self):
+        rows = self.toolbox._align_cues(self.chinese[:2], [])
+        self.assertEqual(rows, [(["中0"], []), (["中1"], [])])
+
+
+class PairBilingualTest(unittest.TestCase):
+    def test_prefers_full_tracks(self):
+        pairs = Toolbox()._pair_bilingual(
+            [
+                "Show.CHS.FORCED.srt",
+                "Show.CHS.srt",
+                "Show.ENG.SDH.srt",
+                "Show.ENG.srt",
+            ]
+        )
+        self.assertEqual(pairs, [("Show.CHS.srt", "Show.ENG.srt")])
+
+    def test_never_pairs_forced_tracks(self):
+        pairs = Toolbox()._pair_bilingual(["Show.CHS.FORCED.srt", "Show.ENG.srt"])
+        self.assertEqual(pairs, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
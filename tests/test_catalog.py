@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+
+from catalog import Catalog
+from toolbox import Toolbox
+
+srt = """1
+00:00:01,000 --> 00:00:02,500
+so I went to the store
+
+2
+00:00:03,000 --> 00:00:04,000
+and bought a cat
+"""
+
+
+class CatalogTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        self.source = self.write("Show.CHS.srt")
+        self.catalog = Catalog(self.path("catalog.db"))
+        self.addCleanup(self.catalog.close)
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def write(self, name):
+        with open(self.path(name), "w", encoding="utf-8") as file:
+            file.write(srt)
+        return self.path(name)
+
+    def add(self, catalog=None, source=None):
+        (catalog or self.catalog).update_source(
+            source or self.source,
+            "标题",
+            "CHS",
+            [(1000, 2500, "a"), (3000, 4000, "b")],
+            "hash",
+        )
+
+    def test_update_and_query(self):
+        self.assertFalse(self.catalog.contains(self.source))
+        self.add()
+        self.catalog.add_output(self.source, self.path("Show.CHS.md"), "md")
+        self.assertTrue(self.catalog.contains(self.source))
+        self.assertTrue(self.catalog.is_fresh(self.source))
+
+        entries = self.catalog.query(language="CHS", _format="md")
+        self.assertEqual(len(entries), 1)
+        entry = entries[0]
+        self.assertEqual(entry["cue_count"], 2)
+        self.assertEqual(entry["runtime_ms"], 4000)
+        self.assertEqual(
+            entry["outputs"], [{"format": "md", "output": self.path("Show.CHS.md")}]
+        )
+        self.assertEqual(self.catalog.query(_format="pdf"), [])
+        self.assertEqual(self.catalog.query(title="不存在"), [])
+
+    def test_lookup_uses_primary_key(self):
+        plan = self.catalog.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT 1 FROM sources WHERE source = ?", ("x",)
+        ).fetchall()
+        self.assertTrue(all(row[-1].startswith("SEARCH") for row in plan), plan)
+
+    def test_rename_and_remove(self):
+        self.add()
+        self.catalog.add_output(self.source, self.path("Show.CHS.md"), "md")
+        new_file = self.path("Show.ENG.srt")
+        self.catalog.rename(self.source, new_file, "ENG")
+        entries = self.catalog.query()
+        self.assertEqual(entries[0]["language"], "ENG")
+        self.assertEqual(len(entries[0]["outputs"]), 1)
+
+        self.catalog.remove(new_file)
+        self.assertEqual(self.catalog.query(), [])
+
+    def test_merge(self):
+        other_source = self.write("Other.ENG.srt")
+        with Catalog(self.path("catalog.shard-1-of-2.db")) as shard:
+            self.add(shard, other_source)
+            shard.add_output(other_source, self.path("Other.ENG.md"), "md")
+        self.add()
+        self.catalog.merge(self.path("catalog.shard-1-of-2.db"))
+        self.catalog.merge(self.path("catalog.shard-1-of-2.db"))
+        entries = self.catalog.query()
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(sum(len(entry["outputs"]) for entry in entries), 1)
+
+    def test_merge_across_mount_points(self):
+        # 两台机器把同一个字幕库挂载在不同位置，合并后的路径在本机仍然有效
+        library = os.path.join(self.folder, "library")
+        os.mkdir(library)
+        with open(os.path.join(library, "Show.CHS.srt"), "w") as file:
+            file.write(srt)
+        for i, mount in enumerate(("node1", "node2"), 1):
+            os.symlink(library, self.path(mount))
+            with Catalog(self.path(f"shard-{i}.db"), self.path(mount)) as shard:
+                self.add(shard, os.path.join(self.path(mount), "Show.CHS.srt"))
+
+        with Catalog(self.path("merged.db"), library) as merged:
+            merged.merge(self.path("shard-1.db"))
+            merged.merge(self.path("shard-2.db"))
+            entries = merged.query()
+        self.assertEqual(
+            [entry["source"] for entry in entries],
+            [os.path.join(library, "Show.CHS.srt")],
+        )
+
+
+class CatalogCuesTest(unittest.TestCase):
+    def test_cues_outputs_are_recorded_against_the_original(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        source = os.path.join(folder.name, "Show.CHS.srt")
+        with open(source, "w", encoding="utf-8") as file:
+            file.write(srt)
+
+        toolbox = Toolbox()
+        toolbox.batch_mode = True
+        toolbox._fetch_title = lambda source_file: "标题"
+        toolbox.catalog_path = os.path.join(folder.name, "catalog.db")
+        toolbox.index_path = os.path.join(folder.name, "subtitles.db")
+
+        cues_file = toolbox.convert(source, folder.name, "cues")
+        toolbox.convert(cues_file, folder.name, "md")
+
+        with Catalog(toolbox.catalog_path) as catalog:
+            entries = catalog.query()
+        self.assertEqual([entry["source"] for entry in entries], [source])
+        self.assertEqual(
+            sorted(output["format"] for output in entries[0]["outputs"]),
+            ["cues", "md"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
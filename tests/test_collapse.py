@@ -0,0 +1,90 @@
+import io
+import os
+import tempfile
+import unittest
+
+from toolbox import Toolbox
+
+rolling = [
+    (0, 1000, "so I went"),
+    (1000, 2000, "so I went\nto the store"),
+    (2000, 3000, "to the store\nand bought"),
+    (3000, 4000, "to the store\nand bought a cat"),
+    (4000, 5000, "and bought a cat"),
+]
+
+vtt = """WEBVTT
+
+00:00:00.500 --> 00:00:02.000
+so I went to
+
+00:00:02.000 --> 00:00:03.500
+so I went to
+the store and
+
+00:00:03.500 --> 00:00:05.000
+the store and
+bought a cat
+"""
+
+
+class CollapseRollingTest(unittest.TestCase):
+    def setUp(self):
+        self.toolbox = Toolbox()
+
+    def test_collapse(self):
+        stats = {"lines": 0, "bytes": 0}
+        cues = list(self.toolbox._collapse_rolling(rolling, stats))
+        # 逐词补全的行替换上一条的最后一行，没有新内容的字幕只延长结束时间
+        self.assertEqual(
+            cues,
+            [
+                (0, 1000, "so I went"),
+                (1000, 2000, "to the store"),
+                (2000, 5000, "and bought a cat"),
+            ],
+        )
+        self.assertEqual(stats, {"lines": 5, "bytes": 62})
+
+    def test_plain_subtitles_are_unchanged(self):
+        plain = [(0, 1000, "a"), (1000, 2000, "b\nc"), (2000, 3000, "d")]
+        stats = {"lines": 0, "bytes": 0}
+        self.assertEqual(list(self.toolbox._collapse_rolling(plain, stats)), plain)
+        self.assertEqual(stats, {"lines": 0, "bytes": 0})
+
+    def test_is_rolling(self):
+        plain = [(0, 1000, "a"), (1000, 2000, "b"), (2000, 3000, "c")]
+        self.assertTrue(self.toolbox._is_rolling("Show.en[cc].vtt", plain))
+        self.assertTrue(self.toolbox._is_rolling("Show.ENG.CC.srt", plain))
+        self.assertTrue(self.toolbox._is_rolling("Show.ENG.srt", rolling))
+        self.assertFalse(self.toolbox._is_rolling("Show.ENG.srt", plain))
+        self.assertFalse(self.toolbox._is_rolling("Show.ENG.srt", rolling[:2]))
+
+    def test_batch_convert_reports_each_file(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        for name in ("A.en[cc].vtt", "B.en[cc].vtt"):
+            with open(os.path.join(folder.name, name), "w") as file:
+                file.write(vtt)
+
+        output = io.StringIO()
+        self.toolbox._fetch_title = lambda source_file: "标题"
+        self.toolbox.console.file = output
+        self.toolbox.state_file = os.path.join(folder.name, "task_states.json")
+        self.toolbox.catalog_path = os.path.join(folder.name, "catalog.db")
+        self.toolbox.index_path = os.path.join(folder.name, "subtitles.db")
+        self.toolbox.batch_convert(
+            [os.path.join(folder.name, name) for name in ("A.en[cc].vtt", "B.en[cc].vtt")],
+            folder.name,
+            "txt",
+        )
+        report = output.getvalue()
+        self.assertIn("已折叠滚动字幕 A.en[cc].vtt", report)
+        self.assertIn("已折叠滚动字幕 B.en[cc].vtt", report)
+        self.assertIn("已折叠 2 个滚动字幕文件", report)
+        with open(os.path.join(folder.name, "A.en[cc].txt"), encoding="utf-8") as file:
+            self.assertEqual(file.read(), "so I went to\nthe store and\nbought a cat\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
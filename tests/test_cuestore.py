@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+from cuestore import CueStore
+from toolbox import Toolbox
+
+cues = [
+    (0, 1500, "你好"),
+    (1500, 3000, "hello\nworld"),
+    (3000, 4000, "你好"),
+]
+
+
+class CueStoreTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def test_round_trip(self):
+        store = CueStore.from_cues(cues, {"title": "标题", "source": "a.srt"})
+        # 重复的文本只保存一份
+        self.assertEqual(len(store.offsets) - 1, 2)
+        store.save(self.path("a.cues"))
+
+        with CueStore.load(self.path("a.cues")) as loaded:
+            self.assertEqual(list(loaded), cues)
+            self.assertEqual(len(loaded), 3)
+            self.assertEqual(loaded[1], cues[1])
+            self.assertEqual(loaded.meta, {"title": "标题", "source": "a.srt"})
+            loaded.save(self.path("b.cues"))
+
+        with open(self.path("a.cues"), "rb") as a, open(self.path("b.cues"), "rb") as b:
+            self.assertEqual(a.read(), b.read())
+
+    def test_empty_store(self):
+        CueStore.from_cues([]).save(self.path("empty.cues"))
+        with CueStore.load(self.path("empty.cues")) as loaded:
+            self.assertEqual(list(loaded), [])
+
+    def test_close_is_idempotent(self):
+        CueStore.from_cues(cues).save(self.path("a.cues"))
+        loaded = CueStore.load(self.path("a.cues"))
+        loaded.close()
+        loaded.close()
+
+    def test_corrupt_input(self):
+        with open(self.path("bad.cues"), "wb") as file:
+            file.write(b"x" * 64)
+        with self.assertRaises(ValueError):
+            CueStore.load(self.path("bad.cues"))
+
+        open(self.path("zero.cues"), "wb").close()
+        with self.assertRaises(ValueError):
+            CueStore.load(self.path("zero.cues"))
+
+    def test_toolbox_skips_unreadable_store(self):
+        open(self.path("zero.cues"), "wb").close()
+        CueStore.from_cues(cues, {"title": "标题"}).save(self.path("a.cues"))
+        toolbox = Toolbox()
+        toolbox.batch_mode = True
+        self.assertIsNone(toolbox._read_cues(self.path("zero.cues")))
+        self.assertIsNone(toolbox._get_title(self.path("zero.cues"), None))
+
+        # 一个损坏的列存文件不会中断整个索引
+        toolbox.index_path = self.path("subtitles.db")
+        toolbox.build_index([self.folder])
+        self.assertEqual(len(toolbox.search("你好")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
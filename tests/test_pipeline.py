@@ -0,0 +1,136 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from pipeline import Pipeline, Stage
+from toolbox import Toolbox
+
+srt = """1
+00:00:01,000 --> 00:00:02,500
+so I went to the store
+
+2
+00:00:03,000 --> 00:00:04,000
+and bought a cat
+"""
+
+
+class PipelineTest(unittest.TestCase):
+    def test_all_items_reach_the_end(self):
+        stages = [
+            Stage("double", lambda x: x * 2, workers=3),
+            Stage("inc", lambda x: x + 1, workers=2),
+        ]
+        results = []
+        Pipeline(stages, queue_size=2).run(range(100), results.append)
+        self.assertEqual(sorted(results), [x * 2 + 1 for x in range(100)])
+
+    def test_empty_input(self):
+        results = []
+        Pipeline([Stage("noop", lambda x: x, workers=4)]).run([], results.append)
+        self.assertEqual(results, [])
+
+    def test_failure_skips_later_stages(self):
+        seen = []
+
+        def check(x):
+            if x == 3:
+                raise ValueError("bad item")
+            return x
+
+        def record(x):
+            seen.append(x)
+            return x
+
+        errors = []
+        results = []
+        Pipeline(
+            [Stage("check", check, workers=2), Stage("record", record)]
+        ).run(
+            range(6),
+            results.append,
+            lambda job, stage, error: errors.append((job, stage, str(error))),
+        )
+        self.assertEqual(errors, [(3, "check", "bad item")])
+        self.assertEqual(sorted(results), [0, 1, 2, 4, 5])
+        self.assertNotIn(3, seen)
+
+    def test_backpressure_bounds_items_in_flight(self):
+        release = threading.Event()
+        fed = []
+
+        def items():
+            for x in range(100):
+                fed.append(x)
+                yield x
+
+        def slow(x):
+            release.wait(5)
+            return x
+
+        results = []
+        pipeline = Pipeline([Stage("slow", slow)], queue_size=1)
+        thread = threading.Thread(target=pipeline.run, args=(items(), results.append))
+        thread.start()
+        time.sleep(0.2)
+        # 一个被处理的任务、两个队列各一个，再加上等待放入队列的一个
+        self.assertLessEqual(len(fed), 4)
+        release.set()
+        thread.join(5)
+        self.assertEqual(results, list(range(100)))
+
+
+class ConvertPipelineTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        self.output = self.path("out")
+        os.mkdir(self.output)
+        self.toolbox = Toolbox()
+        self.toolbox._fetch_title = lambda source_file: "标题"
+        self.toolbox.state_file = self.path("task_states.json")
+        self.toolbox.catalog_path = self.path("catalog.db")
+        self.toolbox.index_path = self.path("subtitles.db")
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def write(self, name, content=srt):
+        with open(self.path(name), "w", encoding="utf-8") as file:
+            file.write(content)
+        return self.path(name)
+
+    def test_batch_matches_single_convert(self):
+        source = self.write("Show.ENG.srt")
+        for _format in ("txt", "cues"):
+            self.toolbox.batch_convert([source], self.output, _format)
+            target_file = os.path.join(self.output, f"Show.ENG.{_format}")
+            with open(target_file, "rb") as file:
+                batch = file.read()
+            os.remove(target_file)
+            self.assertEqual(
+                self.toolbox.convert(source, self.output, _format), target_file
+            )
+            with open(target_file, "rb") as file:
+                self.assertEqual(file.read(), batch, _format)
+
+    def test_failed_files_are_not_checkpointed(self):
+        good = self.write("Good.ENG.srt")
+        bad = self.write("Bad.ENG.cues", "not a cue store")
+        self.toolbox.batch_convert([good, bad], self.output, "txt")
+        with open(self.toolbox.state_file) as file:
+            self.assertEqual(json.load(file), {"convert_txt": [good]})
+        self.assertEqual(os.listdir(self.output), ["Good.ENG.txt"])
+
+    def test_unsupported_format(self):
+        source = self.write("Show.ENG.srt")
+        self.assertEqual(self.toolbox.convert(source, self.output, "exe"), "")
+        self.assertEqual(os.listdir(self.output), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+
+from search import SearchIndex
+from toolbox import Toolbox
+
+srt = """1
+00:00:01,000 --> 00:00:02,500
+so I went to the store
+
+2
+00:00:03,000 --> 00:00:04,000
+我买了一只猫
+"""
+
+
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        self.source = self.path("Show.CHS.srt")
+        with open(self.source, "w", encoding="utf-8") as file:
+            file.write(srt)
+        self.index = SearchIndex(self.path("subtitles.db"))
+        self.addCleanup(self.index.close)
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def add(self):
+        self.index.update(
+            self.source,
+            "CHS",
+            "标题",
+            [(1000, 2500, "so I went to the store"), (3000, 4000, "我买了一只猫")],
+        )
+
+    def test_search(self):
+        self.add()
+        hits = self.index.search("the store")
+        self.assertEqual(len(hits), 1)
+        self.assertEqual(hits[0]["file"], os.path.abspath(self.source))
+        self.assertEqual((hits[0]["start_ms"], hits[0]["end_ms"]), (1000, 2500))
+        self.assertEqual(hits[0]["title"], "标题")
+        # 少于 3 个字符的查询也能命中
+        self.assertEqual(self.index.search("猫")[0]["text"], "我买了一只猫")
+        self.assertEqual(self.index.search("狗"), [])
+
+    def test_is_fresh(self):
+        self.assertFalse(self.index.is_fresh(self.source))
+        self.add()
+        self.assertTrue(self.index.is_fresh(self.source))
+        with open(self.source, "a", encoding="utf-8") as file:
+            file.write("\n")
+        self.assertFalse(self.index.is_fresh(self.source))
+
+    def test_update_replaces_cues(self):
+        self.add()
+        self.add()
+        self.assertEqual(len(self.index.search("猫")), 1)
+
+    def test_rename_and_remove(self):
+        self.add()
+        new_file = self.path("Show.ENG.srt")
+        os.rename(self.source, new_file)
+        self.index.rename(self.source, new_file, "ENG")
+        hits = self.index.search("the store")
+        self.assertEqual(hits[0]["file"], os.path.abspath(new_file))
+        self.assertEqual(hits[0]["language"], "ENG")
+        self.assertTrue(self.index.is_fresh(new_file))
+
+        self.index.remove(new_file)
+        self.assertEqual(self.index.search("the store"), [])
+
+    def test_toolbox_rename_updates_index(self):
+        source = self.path("Show.en[cc].srt")
+        os.rename(self.source, source)
+        toolbox = Toolbox()
+        toolbox.batch_mode = True
+        toolbox.index_path = self.index.path
+        toolbox.catalog_path = self.path("catalog.db")
+        self.source = source
+        self.add()
+
+        self.assertEqual(toolbox.rename(source), "Show.ENG.srt")
+        hits = self.index.search("the store")
+        self.assertEqual(len(hits), 1)
+        self.assertEqual(hits[0]["file"], os.path.abspath(self.path("Show.ENG.srt")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from server import ToolboxServer
+
+
+class FakeToolbox:
+    def __init__(self):
+        self.batch_mode = False
+        self.release = threading.Event()
+        self.release.set()
+
+    def keep_browser(self):
+        pass
+
+    def quit_browser(self):
+        pass
+
+    def convert(self, source_file, target_path=None, _format=None):
+        self.release.wait(5)
+        return f"{source_file}.{_format}"
+
+    def rename(self, source_file):
+        return source_file
+
+    def clean_folder(self, input_folder):
+        return []
+
+
+class ToolboxServerTest(unittest.TestCase):
+    def start(self, workers=2, queue_size=32):
+        self.toolbox = FakeToolbox()
+        self.server = ToolboxServer(
+            self.toolbox, port=0, workers=workers, queue_size=queue_size
+        )
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.addCleanup(self.stop)
+        host, port = self.server.address
+        self.url = f"http://{host}:{port}"
+
+    def stop(self):
+        self.toolbox.release.set()
+        self.server.shutdown()
+        self.thread.join(5)
+
+    def request(self, path, body=None):
+        data = None if body is None else json.dumps(body).encode("utf-8")
+        try:
+            with urllib.request.urlopen(f"{self.url}{path}", data, timeout=5) as r:
+                return r.status, json.loads(r.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_convert(self):
+        self.start()
+        status, body = self.request(
+            "/convert", {"source": "a.srt", "output": "out", "format": "pdf"}
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(body, {"output": "a.srt.pdf"})
+
+    def test_bad_requests_are_rejected_before_queueing(self):
+        self.start()
+        for body in (
+            {"bogus": 1},
+            [1],
+            {},
+            {"source": "a.srt", "bogus": 1},
+            {"source": 1},
+            {"source": "a.srt", "format": "exe"},
+        ):
+            status, _ = self.request("/convert", body)
+            self.assertEqual(status, 400, body)
+        status, _ = self.request("/unknown", {})
+        self.assertEqual(status, 404)
+
+        _, metrics = self.request("/metrics")
+        self.assertEqual(metrics["errors"], 0)
+        self.assertEqual(metrics["requests"], {})
+
+    def test_full_queue_returns_503(self):
+        self.start(workers=1, queue_size=1)
+        self.toolbox.release.clear()
+        results = []
+
+        def post(source):
+            results.append(self.request("/convert", {"source": source})[0])
+
+        # 第一个请求占住唯一的工作线程，第二个请求占满队列
+        first = threading.Thread(target=post, args=("a.srt",))
+        first.start()
+        self.wait_for(lambda: self.server.metrics()["active"] == 1)
+        second = threading.Thread(target=post, args=("b.srt",))
+        second.start()
+        self.wait_for(lambda: self.server.metrics()["queue_depth"] == 1)
+
+        status, body = self.request("/convert", {"source": "c.srt"})
+        self.assertEqual(status, 503)
+        self.assertIn("error", body)
+
+        self.toolbox.release.set()
+        first.join(5)
+        second.join(5)
+        self.assertEqual(results, [200, 200])
+
+        status, metrics = self.request("/metrics")
+        self.assertEqual(status, 200)
+        self.assertEqual(metrics["rejected"], 1)
+        self.assertEqual(metrics["errors"], 0)
+        self.assertEqual(metrics["requests"], {"convert": 2})
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertEqual(metrics["queue_size"], 1)
+        self.assertEqual(metrics["workers"], 1)
+        self.assertEqual(metrics["active"], 0)
+        self.assertEqual(metrics["latency_ms"]["convert"]["count"], 2)
+
+    def test_health(self):
+        self.start()
+        self.assertEqual(self.request("/health"), (200, {"status": "ok"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
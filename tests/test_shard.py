@@ -0,0 +1,115 @@
+import argparse
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from catalog import Catalog
+from toolbox import Toolbox, parse_shard
+
+files = [f"/library/Show.S01E{i:02d}.CHS.srt" for i in range(1, 41)]
+
+
+class ShardFilesTest(unittest.TestCase):
+    def shards(self, count, paths=files, key=None):
+        toolbox = Toolbox()
+        result = []
+        for index in range(1, count + 1):
+            toolbox.shard = (index, count)
+            result.append(toolbox._shard_files(paths, key))
+        return result
+
+    def test_without_shard_returns_all_files(self):
+        self.assertIs(Toolbox()._shard_files(files), files)
+
+    def test_shards_partition_the_files(self):
+        shards = self.shards(3)
+        self.assertEqual(sorted(f for shard in shards for f in shard), sorted(files))
+        self.assertEqual(sum(len(shard) for shard in shards), len(files))
+        self.assertTrue(all(shard for shard in shards))
+
+    def test_partition_ignores_mount_point(self):
+        # 同一文件在不同机器上挂载路径不同，仍分到同一个分片
+        moved = [f.replace("/library", "/mnt/nas/subtitles") for f in files]
+        self.assertEqual(
+            [[os.path.basename(f) for f in shard] for shard in self.shards(4)],
+            [[os.path.basename(f) for f in shard] for shard in self.shards(4, moved)],
+        )
+
+    def test_key(self):
+        pairs = [(f, f.replace(".CHS.", ".ENG.")) for f in files]
+        shards = self.shards(2, pairs, key=lambda pair: pair[0])
+        self.assertEqual(
+            [[pair[0] for pair in shard] for shard in shards], self.shards(2)
+        )
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/3"), (2, 3))
+        for value in ("0/3", "4/3", "1", "a/b"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_shard(value)
+
+
+class MergeStateTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(folder.name)
+        self.output = io.StringIO()
+        self.toolbox = Toolbox()
+        self.toolbox.console.file = self.output
+
+    def write_state(self, name, states):
+        with open(name, "w") as file:
+            json.dump(states, file)
+
+    def test_merges_shard_states(self):
+        with open("task_states.json", "w") as file:
+            json.dump({"convert_md": ["a.srt"]}, file)
+        self.write_state(
+            "task_states.shard-1-of-2.json", {"convert_md": ["a.srt", "b.srt"]}
+        )
+        self.write_state(
+            "task_states.shard-2-of-2.json",
+            {"convert_md": ["c.srt"], "rename": ["d.srt"]},
+        )
+        self.toolbox.merge_state()
+
+        with open("task_states.json") as file:
+            self.assertEqual(
+                json.load(file),
+                {"convert_md": ["a.srt", "b.srt", "c.srt"], "rename": ["d.srt"]},
+            )
+        self.assertIn("已将 2 个分片断点合并到 task_states.json", self.output.getvalue())
+        self.assertNotIn("缺少分片", self.output.getvalue())
+
+    def test_reports_missing_shards(self):
+        self.write_state("task_states.shard-2-of-3.json", {"convert_md": ["a.srt"]})
+        self.toolbox.merge_state()
+        self.assertIn("缺少分片的断点文件: 1/3, 3/3", self.output.getvalue())
+
+    def test_no_shard_files(self):
+        self.toolbox.merge_state()
+        self.assertIn("未找到分片断点文件", self.output.getvalue())
+        self.assertFalse(os.path.exists("task_states.json"))
+
+    def test_merges_shard_catalogs(self):
+        for i, name in enumerate(("A.CHS.srt", "B.CHS.srt"), 1):
+            with open(name, "w") as file:
+                file.write("")
+            with Catalog(f"catalog.shard-{i}-of-2.db") as shard:
+                shard.update_source(name, "标题", "CHS", [(0, 1000, "a")], "hash")
+        self.toolbox.merge_state()
+
+        with Catalog("catalog.db") as catalog:
+            sources = sorted(entry["source"] for entry in catalog.query())
+        self.assertEqual(
+            sources, [os.path.abspath("A.CHS.srt"), os.path.abspath("B.CHS.srt")]
+        )
+        self.assertIn("已将 2 个分片的目录合并到 catalog.db", self.output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 import zipfile
+import io
 import os
 import re
 import html
@@ -10,15 +11,24 @@ import ass
 import pysrt
 import datetime
 from template import MarkdownTemplate, HTMLTemplate
+from search import SearchIndex
+from catalog import Catalog
+from cuestore import CueStore
+from database import library_key, library_path
+from pipeline import Pipeline, Stage
 from DrissionPage import ChromiumPage, ChromiumOptions
 import requests
 from rich.progress import Progress, BarColumn
 from rich.console import Console
+from rich.markup import escape
 import argparse
 import json
-from collections import defaultdict
+from collections import defaultdict, deque
 from opencc import OpenCC
 import filecmp
+import glob
+import hashlib
+import queue
 
 cc = OpenCC("s2t")
 
@@ -41,6 +51,10 @@ class Toolbox:
         self.chrome_path = "tools/chrome/chrome.exe"
         self.pandoc_path = "tools/pandoc/pandoc.exe"
         self.template_path = "templates"
+        self.index_path = "subtitles.db"
+        self.catalog_path = "catalog.db"
+        # 字幕库根目录，目录和索引中的路径都相对于它记录，默认为当前目录
+        self.library_root = None
         self.api_key = "4d81bcbc939fae61654a32969f4ca989"
         os.environ["PATH"] += os.pathsep + self.pandoc_path
         os.environ["PATH"] += os.pathsep + self.chrome_path
@@ -55,16 +69,133 @@ class Toolbox:
             console=self.console,
         )
         self.task_states = {}
+        self.state_file = "task_states.json"
+        self.shard = None
+        self.page_pool = None
+        # 滚动字幕折叠：auto 只处理 CC 字幕，on 全部处理，off 关闭
+        self.collapse = "auto"
+        # 批量转换流水线各阶段的线程数和阶段间队列长度
+        self.stage_workers = {
+            "read": 2,
+            "parse": 2,
+            "title": 4,
+            "render": 2,
+            "write": 1,
+        }
+        self.queue_size = 8
+        self.titles = {}
         self.batch_mode = False
 
+    def set_shard(self, index, count):
+        # 每个分片使用独立的断点文件，多台机器共享存储时互不覆盖
+        self.shard = (index, count)
+        self.state_file = f"task_states.shard-{index}-of-{count}.json"
+        # SQLite 的文件锁在网络存储上不可靠，目录和索引也按分片分开写入，
+        # 全部完成后由 merge-state 合并
+        self.catalog_path = f"catalog.shard-{index}-of-{count}.db"
+        if os.path.exists(self.index_path):
+            self.index_path = f"subtitles.shard-{index}-of-{count}.db"
+            SearchIndex(self.index_path).close()
+
+    def _shard_files(self, files, key=None):
+        if not self.shard:
+            return files
+        index, count = self.shard
+        key = key or (lambda f: f)
+        # 只按文件名哈希，不同机器上挂载路径不同也能得到相同的划分
+        return [
+            f
+            for f in files
+            if int(
+                hashlib.md5(os.path.basename(key(f)).encode("utf-8")).hexdigest(), 16
+            )
+            % count
+            == index - 1
+        ]
+
+    def merge_state(self):
+        shard_files = sorted(glob.glob("task_states.shard-*-of-*.json"))
+        merged_databases = self._merge_databases()
+        if not shard_files:
+            if not merged_databases:
+                self.console.print("[red]未找到分片断点文件[/red]")
+            return
+
+        merged = defaultdict(dict)
+        counts = defaultdict(dict)
+        shard_counts = set()
+        for shard_file in shard_files:
+            match = re.search(r"shard-(\d+)-of-(\d+)\.json$", shard_file)
+            shard = f"{match.group(1)}/{match.group(2)}"
+            shard_counts.add(int(match.group(2)))
+            with open(shard_file, "r") as f:
+                states = json.load(f)
+            for task_id, completed_files in states.items():
+                counts[task_id][shard] = len(completed_files)
+                merged[task_id].update(dict.fromkeys(completed_files))
+
+        if len(shard_counts) > 1:
+            self.console.print(
+                f"[yellow]⚠️ 发现不同分片总数的断点文件: {sorted(shard_counts)}[/yellow]"
+            )
+        for count in shard_counts:
+            missing = [
+                f"{i}/{count}"
+                for i in range(1, count + 1)
+                if not os.path.exists(f"task_states.shard-{i}-of-{count}.json")
+            ]
+            if missing:
+                self.console.print(
+                    f"[yellow]⚠️ 缺少分片的断点文件: {', '.join(missing)}[/yellow]"
+                )
+
+        try:
+            with open(self.state_file, "r") as f:
+                self.task_states = json.load(f)
+        except FileNotFoundError:
+            self.task_states = {}
+        for task_id, completed_files in merged.items():
+            self.task_states[task_id] = list(
+                dict.fromkeys(self.task_states.get(task_id, []) + list(completed_files))
+            )
+        with open(self.state_file, "w") as f:
+            json.dump(self.task_states, f)
+
+        for task_id, shards in counts.items():
+            detail = ", ".join(f"{shard}: {n}" for shard, n in sorted(shards.items()))
+            self.console.print(
+                f"[blue]{task_id}[/blue] 共完成 [green]{len(merged[task_id])}[/green] 个 ({detail})"
+            )
+        self.console.print(
+            f"[green]🎉 已将 {len(shard_files)} 个分片断点合并到 {self.state_file}"
+        )
+
+    def _merge_databases(self):
+        merged = 0
+        for pattern, target_path, database, name in (
+            ("catalog.shard-*-of-*.db", self.catalog_path, Catalog, "目录"),
+            ("subtitles.shard-*-of-*.db", self.index_path, SearchIndex, "索引"),
+        ):
+            shard_paths = sorted(glob.glob(pattern))
+            if not shard_paths:
+                continue
+            with database(target_path, self.library_root) as target:
+                for shard_path in shard_paths:
+                    target.merge(shard_path)
+            merged += len(shard_paths)
+            self.console.print(
+                f"[green]🎉 已将 {len(shard_paths)} 个分片的{name}合并到 {target_path}"
+            )
+        return merged
+
     def save_task_state(self, task_id, completed_files):
         self.task_states[task_id] = completed_files
-        with open("task_states.json", "w") as f:
+        with open(self.state_file, "w") as f:
             json.dump(self.task_states, f)
 
     def load_task_state(self, task_id):
         try:
-            with open("task_states.json", "r") as f:
+            with open(self.state_file, "r") as f:
                 self.task_states = json.load(f)
             return self.task_states.get(task_id, [])
         except FileNotFoundError:
@@ -75,6 +206,7 @@ class Toolbox:
         self.batch_mode = True
         task_id = "unzip"
         completed_files = self.load_task_state(task_id) if resume else []
+        zip_files = self._shard_files(zip_files)
 
         with self.progress:
             task = self.progress.add_task(
@@ -100,46 +232,37 @@ class Toolbox:
         self.batch_mode = True
         task_id = f"convert_{_format}"
         completed_files = self.load_task_state(task_id) if resume else []
+        source_files = self._shard_files(source_files)
 
         with self.progress:
             task = self.progress.add_task(
                 f"[blue]🔄 转换为 {_format}...", total=len(source_files), filename=""
             )
 
+            pending_files = []
             for source_file in source_files:
-                self.progress.update(
-                    task, filename=f"正在处理: {os.path.basename(source_file)}"
-                )
                 if source_file in completed_files:
                     self.progress.advance(task)
-                    continue
-
-                self.convert(source_file, target_path, _format)
-                completed_files.append(source_file)
-                self.save_task_state(task_id, completed_files)
+                else:
+                    pending_files.append(source_file)
 
+            def on_done(source_file, success):
+                self.progress.update(
+                    task, filename=f"已完成: {os.path.basename(source_file)}"
+                )
+                if success:
+                    completed_files.append(source_file)
+                    self.save_task_state(task_id, completed_files)
                 self.progress.advance(task)
+
+            self._run_convert_pipeline(pending_files, target_path, _format, on_done)
         self.batch_mode = False
 
     def batch_rename(self, input_paths, resume=False):
         self.batch_mode = True
         task_id = "rename"
         completed_files = self.load_task_state(task_id) if resume else []
-        files_to_rename = []
-
-        for input_path in input_paths:
-            if os.path.isdir(input_path):
-                files_to_rename.extend(
-                    [
-                        os.path.join(input_path, f)
-                        for f in os.listdir(input_path)
-                        if f.endswith((".vtt", ".srt", ".ass"))
-                    ]
-                )
-            elif os.path.isfile(input_path) and input_path.endswith(
-                (".vtt", ".srt", ".ass")
-            ):
-                files_to_rename.append(input_path)
+        files_to_rename = self._shard_files(self._collect_subtitles(input_paths))
 
         with self.progress:
             task = self.progress.add_task(
@@ -167,9 +290,9 @@ class Toolbox:
         completed_files = self.load_task_state(task_id) if resume else []
 
         dcmp = filecmp.dircmp(source_folder, target_folder)
-        missing_files = [
-            file for file in dcmp.left_only if file.endswith((".vtt", ".srt", ".ass"))
-        ]
+        missing_files = self._shard_files(
+            [file for file in dcmp.left_only if file.endswith((".vtt", ".srt", ".ass"))]
+        )
 
         if missing_files:
             self.console.print("[yellow][b]📋 以下文件在目标目录中缺失:[/b][/yellow]")
@@ -202,19 +325,119 @@ class Toolbox:
                 "[cyan]🔍 比对并转换文件...", total=len(files_to_process), filename=""
             )
 
-            for file in files_to_process:
-                source_file = os.path.join(source_folder, file)
-                self.progress.update(task, filename=f"正在处理: {file}")
-                self.convert(source_file, target_folder, _format)  # 默认转换为 markdown
-                completed_files.append(file)
-                self.save_task_state(task_id, completed_files)
+            def on_done(source_file, success):
+                file = os.path.basename(source_file)
+                self.progress.update(task, filename=f"已完成: {file}")
+                if success:
+                    completed_files.append(file)
+                    self.save_task_state(task_id, completed_files)
                 self.progress.advance(task)
 
+            self._run_convert_pipeline(
+                [os.path.join(source_folder, file) for file in files_to_process],
+                target_folder,
+                _format,
+                on_done,
+            )
+
         self.batch_mode = False
         self.console.print(
             f"[green]🎉 完成比对和转换。共处理 {len(files_to_process)} 个文件。"
         )
 
+    def build_index(self, input_paths):
+        self.batch_mode = True
+        # 列存文件排在原字幕之后，原字幕已建立索引时就不再重复收录
+        source_files = sorted(
+            self._collect_subtitles(input_paths, (".vtt", ".srt", ".ass", ".cues")),
+            key=lambda f: f.lower().endswith(".cues"),
+        )
+        indexed = 0
+
+        with self.progress, SearchIndex(self.index_path, self.library_root) as index:
+            task = self.progress.add_task(
+                "[yellow]🗂️ 建立索引...", total=len(source_files), filename=""
+            )
+
+            for source_file in source_files:
+                self.progress.update(
+                    task, filename=f"正在处理: {os.path.basename(source_file)}"
+                )
+                try:
+                    if self._update_index(source_file, index):
+                        indexed += 1
+                except Exception as e:
+                    self.console.print(
+                        f"[red]索引文件 {source_file} 时出错: {str(e)}[/red]"
+                    )
+                self.progress.advance(task)
+
+        self.batch_mode = False
+        self.console.print(
+            f"[green]🎉 索引完成。新增或更新 {indexed} 个文件，"
+            f"跳过 {len(source_files) - indexed} 个未变化的文件。"
+        )
+
+    def search(self, query, limit=20):
+        if not os.path.exists(self.index_path):
+            self.console.print("[red]未找到索引文件，请先运行 index 命令[/red]")
+            return []
+
+        with SearchIndex(self.index_path, self.library_root) as index:
+            hits = index.search(query, limit)
+
+        if not hits:
+            self.console.print(f"[yellow]没有找到包含 '{query}' 的字幕[/yellow]")
+        for hit in hits:
+            self.console.print(
+                f"[blue][b]{escape(str(hit['title']))}[/b][/blue] ({hit['language']}) "
+                f"[dim]{escape(hit['file'])}[/dim]"
+            )
+            self.console.print(
+                f"  [green]{hit['start_ms']}ms - {hit['end_ms']}ms[/green] "
+                f"{escape(hit['text'])}"
+            )
+        return hits
+
+    def _update_index(self, source_file, index, cues=None, title=None):
+        if index.is_fresh(source_file):
+            return False
+        # 调用方已解析过的字幕直接复用，否则在这里读取并负责释放
+        owned = cues is None
+        if owned:
+            cues = self._read_cues(source_file)
+            if cues is None:
+                return False
+        try:
+            if self._cues_origin(source_file, cues, index) != source_file:
+                return False
+            filename = os.path.basename(source_file)
+            index.update(
+                source_file,
+                self._get_lang_code(filename),
+                title or self._get_title(source_file, cues),
+                cues,
+            )
+        finally:
+            if owned:
+                self._release_cues(cues)
+        return True
+
+    def _collect_subtitles(self, input_paths, extensions=(".vtt", ".srt", ".ass")):
+        source_files = []
+        for input_path in input_paths:
+            if os.path.isdir(input_path):
+                source_files.extend(
+                    [
+                        os.path.join(input_path, f)
+                        for f in os.listdir(input_path)
+                        if f.endswith(extensions)
+                    ]
+                )
+            elif os.path.isfile(input_path) and input_path.endswith(extensions):
+                source_files.append(input_path)
+        return source_files
+
     def unzip(self, zip_file_path, output_folder):
         try:
             file_name = os.path.basename(zip_file_path)
@@ -314,6 +537,9 @@ class Toolbox:
                     std_lang_code = lang_map.get(lang_code, "Unknown")
                     new_filename = f"{title}.{std_lang_code}{ext}"
                     os.rename(source_file, os.path.join(dirname, new_filename))
+                    self._rename_records(
+                        source_file, os.path.join(dirname, new_filename)
+                    )
 
                 if new_filename != filename:
                     if not self.batch_mode:
@@ -336,7 +562,35 @@ class Toolbox:
                 self.console.print(f"[red] 重命名文件时出错: {str(e)}[/red]")
             return filename
 
-    def _get_title(self, source_file):
+    def _rename_records(self, source_file, new_file):
+        # 目录和索引中的记录随文件一起改名，避免搜索到已不存在的文件
+        language = self._get_lang_code(os.path.basename(new_file))
+        if os.path.exists(self.catalog_path):
+            with Catalog(self.catalog_path, self.library_root) as catalog:
+                catalog.rename(source_file, new_file, language)
+        if os.path.exists(self.index_path):
+            with SearchIndex(self.index_path, self.library_root) as index:
+                index.rename(source_file, new_file, language)
+
+    def _remove_records(self, source_file):
+        if os.path.exists(self.catalog_path):
+            with Catalog(self.catalog_path, self.library_root) as catalog:
+                catalog.remove(source_file)
+        if os.path.exists(self.index_path):
+            with SearchIndex(self.index_path, self.library_root) as index:
+                index.remove(source_file)
+
+    def _get_title(self, source_file, cues=None):
+        # 标题只取决于文件名，缓存后同一文件不再重复请求 TMDB
+        filename = os.path.basename(source_file)
+        if filename.endswith(".cues"):
+            # 列存文件的标题在元数据中，直接取调用方已读入的列存文件，不再重复加载
+            return cues.meta.get("title") if isinstance(cues, CueStore) else None
+        if filename not in self.titles:
+            self.titles[filename] = self._fetch_title(source_file)
+        return self.titles[filename]
+
+    def _fetch_title(self, source_file):
         try:
             # 从文件名中提取可能的标题
             filename = os.path.splitext(os.path.basename(source_file))[0]
@@ -382,124 +636,193 @@ class Toolbox:
             self.console.print(f"[red]获取标题时出错: {str(e)}[/red]")
             return title
 
-    def _convert_charset(self, source_file: str):
+    def _convert_charset(self, source_file: str, raw_data: bytes):
         try:
-            ext = os.path.splitext(source_file)[1]
-            with open(source_file, "rb") as file:
-                raw_data = file.read()
-                result = chardet.detect(raw_data)
-                source_encoding = result["encoding"]
-            with open(source_file, "r", encoding=source_encoding) as sf:
-                content = sf.read()
-
-            with tempfile.NamedTemporaryFile(
-                mode="w+", encoding="utf-8", delete=False, suffix=ext
-            ) as temp_file:
-                temp_file.write(content)
-                if not self.batch_mode:
-                    self.console.print(
-                        f"[green]已将 {source_file} 编码 {source_encoding} 转换为utf-8[/green]"
-                    )
-                return temp_file.name
+            result = chardet.detect(raw_data)
+            source_encoding = result["encoding"]
+            content = raw_data.decode(source_encoding)
+            if not self.batch_mode:
+                self.console.print(
+                    f"[green]已将 {source_file} 编码 {source_encoding} 转换为utf-8[/green]"
+                )
+            return content
         except Exception as e:
             if not self.batch_mode:
                 self.console.print(f"[red]转换编码时出错: {str(e)}[/red]")
-            return ""
-
-    def _convert_to_txt(self, source_file, target_path=None, temp=False):
+            return None
+
+    def _read_cues(self, source_file, collapse_stats=None):
+        if source_file.lower().endswith(".cues"):
+            # 列存文件已是清洗后的字幕，跳过编码检测和解析
+            try:
+                return CueStore.load(source_file)
+            except Exception as e:
+                if not self.batch_mode:
+                    self.console.print(
+                        f"[red]读取列存文件 '{os.path.basename(source_file)}' 时出错: {str(e)}[/red]"
+                    )
+                return None
         try:
-            source_file = self._convert_charset(source_file)
-            filename = f"{os.path.splitext(os.path.basename(source_file))[0]}.txt"
-            file_extension = os.path.splitext(source_file)[1].lower()
-            content = ""
-            match file_extension:
-                case ".vtt":
-                    content = self._process_vtt(source_file)
-                case ".srt":
-                    content = self._process_srt(source_file)
-                case ".ass":
-                    content = self._process_ass(source_file)
-                case _:
-                    if not self.batch_mode:
-                        self.console.print(
-                            f"[red]不支持的文件格式: {file_extension}[/red]"
-                        )
-                    return ""
-            if temp:
-                with tempfile.NamedTemporaryFile(
-                    mode="w+", encoding="utf-8", delete=False, suffix=".txt"
-                ) as temp_file:
-                    temp_file.write(content)
-                    if not self.batch_mode:
-                        self.console.print(
-                            f"[green]{source_file} 转换为txt成功[/green]"
-                        )
-                    return temp_file.name
-            else:
-                if not target_path:
-                    target_file = filename
-                else:
-                    target_file = os.path.join(target_path, filename)
-                with open(target_file, "w", encoding="utf-8") as txt_file:
-                    txt_file.write(content)
-                    if not self.batch_mode:
-                        self.console.print(
-                            f"[green]{source_file} 转换为txt成功[/green]"
-                        )
-                    return target_file
-        except Exception as e:
+            with open(source_file, "rb") as file:
+                raw_data = file.read()
+        except OSError as e:
             if not self.batch_mode:
                 self.console.print(
-                    f"[red]处理文件 '{os.path.basename(source_file)}' 时出错: {str(e)}[/red]"
+                    f"[red]读取文件 {source_file} 时出错: {str(e)}[/red]"
                 )
-            return ""
+            return None
+        return self._parse_cues(source_file, raw_data, collapse_stats)
+
+    def _parse_cues(self, source_file, raw_data, collapse_stats=None):
+        file_extension = os.path.splitext(source_file)[1].lower()
+        if file_extension not in (".vtt", ".srt", ".ass"):
+            if not self.batch_mode:
+                self.console.print(f"[red]不支持的文件格式: {file_extension}[/red]")
+            return None
+        content = self._convert_charset(source_file, raw_data)
+        if content is None:
+            return None
+        match file_extension:
+            case ".vtt":
+                cues = self._process_vtt(source_file, content)
+            case ".srt":
+                cues = self._process_srt(source_file, content)
+            case ".ass":
+                cues = self._process_ass(source_file, content)
+        if self.collapse == "on" or (
+            self.collapse == "auto" and self._is_rolling(source_file, cues)
+        ):
+            stats = {"lines": 0, "bytes": 0}
+            cues = list(self._collapse_rolling(cues, stats))
+            # 折叠结果交给调用方汇报，解析可能发生在流水线的工作线程中
+            if collapse_stats is not None:
+                collapse_stats.update(stats)
+        return cues
+
+    def _report_collapse(self, source_file, stats):
+        self.progress.console.print(
+            f"[dim]已折叠滚动字幕 {escape(os.path.basename(source_file))}: "
+            f"减少 {stats['lines']} 行, {stats['bytes']} 字节[/dim]"
+        )
 
-    def _process_vtt(self, source_file):
+    def _release_cues(self, cues):
+        # 列存文件通过 mmap 读取，用完后及时关闭映射
+        if isinstance(cues, CueStore):
+            cues.close()
+
+    def _is_rolling(self, source_file, cues):
+        # 文件名带 [cc] 或 .CC 的自动字幕，或者开头的字幕大多以上一条的最后一行开头
+        if re.search(r"\[cc\]|\.CC(\.|$)", os.path.splitext(source_file)[0], re.I):
+            return True
+        sample = cues[:20]
+        repeats = sum(
+            1
+            for previous, current in zip(sample, sample[1:])
+            if current[2].split("\n")[0].strip()
+            == previous[2].split("\n")[-1].strip()
+        )
+        return len(sample) > 2 and repeats * 2 >= len(sample) - 1
+
+    def _collapse_rolling(self, cues, stats, window=3):
+        # 逐条处理，只保留最近输出的 window 行和尚未输出的上一条字幕，整体为线性
+        recent = deque(maxlen=window)
+        previous = None
+        for start, end, text in cues:
+            lines = [line.strip() for line in text.split("\n") if line.strip()]
+            stats["lines"] += len(lines)
+            stats["bytes"] += len("\n".join(lines).encode("utf-8"))
+            tail = list(recent)
+            # 去掉与最近输出内容重叠的开头几行；重叠的最后一行若被逐词补全，
+            # 则用补全后的行替换上一条字幕的最后一行
+            for k in range(min(len(tail), len(lines)), 0, -1):
+                if tail[len(tail) - k : -1] != lines[: k - 1]:
+                    continue
+                if lines[k - 1] == tail[-1]:
+                    lines = lines[k:]
+                    break
+                if lines[k - 1].startswith(tail[-1] + " "):
+                    previous[2][-1] = recent[-1] = lines[k - 1]
+                    lines = lines[k:]
+                    break
+            if not lines:
+                # 没有新内容，只延长上一条的结束时间
+                if previous:
+                    previous[1] = max(previous[1], end)
+                continue
+            if previous:
+                yield self._collapsed_cue(previous, stats)
+            previous = [start, end, lines]
+            recent.extend(lines)
+        if previous:
+            yield self._collapsed_cue(previous, stats)
+
+    def _collapsed_cue(self, cue, stats):
+        text = "\n".join(cue[2])
+        stats["lines"] -= len(cue[2])
+        stats["bytes"] -= len(text.encode("utf-8"))
+        return cue[0], cue[1], text
+
+    # 以下 _process_* 方法返回 (开始毫秒, 结束毫秒, 文本) 形式的字幕列表
+    def _process_vtt(self, source_file, content):
         try:
-            
-            content = ""
-            for caption in webvtt.read(source_file):
+            cues = []
+            for caption in webvtt.from_string(content):
                 clean_text = self._clean_text(caption.text)
                 if clean_text:
-                    content += clean_text + "\n"
-            return content
+                    cues.append(
+                        (
+                            self._vtt_ms(caption.start_time),
+                            self._vtt_ms(caption.end_time),
+                            clean_text,
+                        )
+                    )
+            return cues
         except Exception as e:
             self.console.print(
                 f"[red]处理 VTT 文件 '{os.path.basename(source_file)}' 时出错: {str(e)}[/red]"
             )
-            return ""
+            return []
 
-    def _process_srt(self, source_file):
+    def _process_srt(self, source_file, content):
         try:
-            subs = pysrt.open(source_file, encoding="utf-8")
-            content = ""
+            subs = pysrt.from_string(content)
+            cues = []
             for sub in subs:
                 clean_text = self._clean_text(sub.text)
                 if clean_text:
-                    content += clean_text + "\n"
-            return content
+                    cues.append((sub.start.ordinal, sub.end.ordinal, clean_text))
+            return cues
         except Exception as e:
             self.console.print(
                 f"[red]处理 SRT 文件 '{os.path.basename(source_file)}' 时出错: {str(e)}[/red]"
             )
-            return ""
+            return []
 
-    def _process_ass(self, source_file):
+    def _process_ass(self, source_file, content):
         try:
-            content = ""
-            with open(source_file, encoding="utf-8") as ass_file:
-                ass_data = ass.parse(ass_file)
+            cues = []
+            ass_data = ass.parse(io.StringIO(content))
             for event in ass_data.events:
                 clean_text = self._clean_text(event.text)
                 if clean_text:
-                    content += clean_text + "\n"
-            return content
+                    cues.append(
+                        (
+                            int(event.start.total_seconds() * 1000),
+                            int(event.end.total_seconds() * 1000),
+                            clean_text,
+                        )
+                    )
+            return cues
         except Exception as e:
            
             self.console.print(
                 f"[red]处理 ASS 文件 '{os.path.basename(source_file)}' 时出错: {str(e)}[/red]"
             )
-            return ""
+            return []
+
+    def _vtt_ms(self, timestamp):
+        hours, minutes, seconds, milliseconds = timestamp.to_tuple()
+        return ((hours * 60 + minutes) * 60 + seconds) * 1000 + milliseconds
 
     def _clean_text(self, text):
         # 移除HTML实体和标签
@@ -511,114 +834,154 @@ class Toolbox:
         clean_text = clean_text.strip()
         return clean_text
 
-    def _convert_to_markdown(self, source_file, target_path=None, temp=False):
-        txt_file = self._convert_to_txt(source_file, temp=True)
-        filename = f"{os.path.splitext(os.path.basename(source_file))[0]}.md"
-        if txt_file is None:
-            return
-        with open(txt_file, "r", encoding="utf-8") as txt:
-            lines = txt.readlines()
-            content = "".join([f"{line.strip()}  \n" for line in lines])
+    def _render_txt(self, cues):
+        return "".join(f"{text}\n" for _, _, text in cues)
 
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        title = self._get_title(source_file)
-        markdown_content = MarkdownTemplate.render(
-            {"title": title, "timestamp": timestamp, "content": content}
+    def _markdown_content(self, cues):
+        return "".join(
+            f"{line.strip()}  \n" for _, _, text in cues for line in text.split("\n")
         )
-        if temp:
-            with tempfile.NamedTemporaryFile(
-                delete=False, suffix=".md"
-            ) as temp_md_file:
-                temp_md_file.write(markdown_content.encode("utf-8"))
-                if not self.batch_mode:
-                    self.console.print(
-                        f"[green]{source_file} 转换为markdown成功[/green]"
-                    )
-                return temp_md_file.name
-        else:
-            if not target_path:
-                target_file = filename
-            else:
-                target_file = os.path.join(target_path, filename)
-            with open(target_file, "w", encoding="utf-8") as md_file:
-                md_file.write(markdown_content)
-                if not self.batch_mode:
-                    self.console.print(
-                        f"[green]{source_file} 转换为markdown成功[/green]"
-                    )
-                return target_file
 
-    def _convert_to_docx(self, source_file, target_path=None):
-        filename = f"{os.path.splitext(os.path.basename(source_file))[0]}.docx"
-        markdown_temp = self._convert_to_markdown(source_file, temp=True)
-        if not markdown_temp:
-            return
-
-        if not target_path:
-            target_file = filename
-        else:
-            target_file = os.path.join(target_path, filename)
-        try:
-            pypandoc.convert_file(
-                markdown_temp,
-                "docx",
-                outputfile=target_file,
-                extra_args=[
-                    f"--reference-doc={os.path.join(self.template_path, 'template.docx')}"
-                ],
-                encoding="utf-8",
-            )
-            if not self.batch_mode:
-                self.console.print(f"[green]{source_file} 转换为docx成功[/green]")
-        finally:
-            os.unlink(markdown_temp)
+    def _html_content(self, cues):
+        return "".join(
+            f"<p> {line.strip()} </p>"
+            for _, _, text in cues
+            for line in text.split("\n")
+        )
 
-        return target_file
+    def _render_markdown(self, cues, title):
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return MarkdownTemplate.render(
+            {
+                "title": title,
+                "timestamp": timestamp,
+                "content": self._markdown_content(cues),
+            }
+        )
 
-    def _convert_to_html(self, source_file, target_path=None, temp=False):
-        txt_file = self._convert_to_txt(source_file, temp=True)
-        filename = f"{os.path.splitext(os.path.basename(source_file))[0]}.html"
-        if txt_file is None:
-            return
-        with open(txt_file, "r", encoding="utf-8") as txt_file:
-            lines = txt_file.readlines()
-            content = "".join([f"<p> {line.strip()} </p>" for line in lines])
+    def _render_html(self, cues, title):
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        title = self._get_title(source_file)
-        html_content = HTMLTemplate.render(
-            {"title": title, "timestamp": timestamp, "content": content}
+        return HTMLTemplate.render(
+            {"title": title, "timestamp": timestamp, "content": self._html_content(cues)}
+        )
+
+    def _render_cues(self, source_file, cues, title):
+        return CueStore.from_cues(
+            cues,
+            {
+                "source": os.path.basename(source_file),
+                "path": library_key(source_file, self.library_root),
+                "title": title,
+                "language": self._get_lang_code(os.path.basename(source_file)),
+            },
         )
-        if temp:
-            with tempfile.NamedTemporaryFile(
-                mode="w+", encoding="utf-8", delete=False, suffix=".html"
-            ) as temp_file:
-                temp_file.write(html_content)
-                if not self.batch_mode:
-                    self.console.print(f"[green]{source_file} 转换为html成功[/green]")
-                return temp_file.name
-        else:
-            if not target_path:
-                target_file = filename
-            else:
-                target_file = os.path.join(target_path, filename)
-            with open(target_file, "w", encoding="utf-8") as html_file:
-                html_file.write(html_content)
-                if not self.batch_mode:
-                    self.console.print(f"[green]{source_file} 转换为html成功[/green]")
-                return target_file
 
-    def _convert_to_pdf(self, source_file: str, target_path=None):
+    def _render_to(self, source_file, cues, title, target_path, _format):
+        # 单个转换和批量流水线共用的渲染逻辑，返回 (目标文件, 待写入的内容)；
+        # docx 和 pdf 由 pandoc 和 Chromium 直接写出目标文件，待写入的内容为 None
         filename = os.path.splitext(os.path.basename(source_file))[0]
+        target_file = os.path.join(target_path or "", f"{filename}.{_format}")
+        match _format:
+            case "txt":
+                return target_file, self._render_txt(cues)
+            case "md":
+                return target_file, self._render_markdown(cues, title)
+            case "html":
+                return target_file, self._render_html(cues, title)
+            case "cues":
+                return target_file, self._render_cues(source_file, cues, title)
+            case "docx" | "pdf":
+                if _format == "docx":
+                    document = self._render_markdown(cues, title)
+                else:
+                    document = self._render_html(cues, title)
+                with tempfile.NamedTemporaryFile(
+                    mode="w+",
+                    encoding="utf-8",
+                    delete=False,
+                    suffix=".md" if _format == "docx" else ".html",
+                ) as temp_file:
+                    temp_file.write(document)
+                try:
+                    if _format == "docx":
+                        self._markdown_to_docx(temp_file.name, target_file)
+                    else:
+                        target_file = self._html_to_pdf(
+                            temp_file.name, target_path or ".", filename
+                        )
+                        if not target_file:
+                            raise RuntimeError("转换PDF失败")
+                finally:
+                    os.unlink(temp_file.name)
+                return target_file, None
+            case _:
+                raise ValueError(f"不支持的文件格式: {_format}")
+
+    def _write_document(self, target_file, document):
+        if isinstance(document, CueStore):
+            document.save(target_file)
+        elif document is not None:
+            with open(target_file, "w", encoding="utf-8") as file:
+                file.write(document)
+
+    def _after_write(
+        self, source_file, target_file, _format, cues, title, content_hash=None
+    ):
+        # 输出写出后的收尾：已建立索引时随转换增量更新索引，并记录到目录
+        if os.path.exists(self.index_path):
+            with SearchIndex(self.index_path, self.library_root) as index:
+                self._update_index(source_file, index, cues, title)
+        self._update_catalog(source_file, target_file, _format, cues, title, content_hash)
+
+    def _markdown_to_docx(self, markdown_file, target_file, toc=False):
+        extra_args = [
+            f"--reference-doc={os.path.join(self.template_path, 'template.docx')}"
+        ]
+        if toc:
+            extra_args.append("--toc")
+        pypandoc.convert_file(
+            markdown_file,
+            "docx",
+            outputfile=target_file,
+            extra_args=extra_args,
+            encoding="utf-8",
+        )
+
+    def _open_page(self):
+        # 服务模式下复用已启动的浏览器，命令行模式下每次新开一个
+        if self.page_pool is not None:
+            try:
+                return self.page_pool.get_nowait()
+            except queue.Empty:
+                pass
         co = ChromiumOptions(read_file=False)
         co.set_paths(browser_path=self.chrome_path)
         co.headless(True)
         co.auto_port()
-        page = ChromiumPage(addr_or_opts=co)
-        html_temp = self._convert_to_html(source_file, temp=True)
+        return ChromiumPage(addr_or_opts=co)
+
+    def _close_page(self, page):
+        if self.page_pool is not None:
+            self.page_pool.put(page)
+        else:
+            page.quit()
+
+    def keep_browser(self):
+        self.page_pool = queue.Queue()
+
+    def quit_browser(self):
+        if self.page_pool is None:
+            return
+        while not self.page_pool.empty():
+            self.page_pool.get_nowait().quit()
+        self.page_pool = None
+
+    def _html_to_pdf(self, html_file, target_path, filename):
+        page = self._open_page()
 
         try:
-            target_file = os.path.join(target_path, filename)
-            page.get(f"file://{os.path.abspath(html_temp)}")
+            target_file = os.path.join(target_path or ".", f"{filename}.pdf")
+            page.get(f"file://{os.path.abspath(html_file)}")
             main = page.ele("tag:main")
             main.wait.displayed()
             page.save(
@@ -635,32 +998,508 @@ class Toolbox:
             self.console.print(f"[red]转换PDF时出错: {str(e)}[/red]")
             return ""
         finally:
-            page.quit()
-            os.unlink(html_temp)
+            self._close_page(page)
         return target_file
 
+    def _convert_to_bilingual(
+        self, chinese_file, english_file, target_path=None, _format="md"
+    ):
+        chinese_cues = self._read_cues(chinese_file)
+        english_cues = self._read_cues(english_file)
+        if chinese_cues is None or english_cues is None:
+            return ""
+        rows = self._align_cues(chinese_cues, english_cues)
+        # 例如 Show.Name.CHS.srt + Show.Name.ENG.srt -> Show.Name.CHS.ENG
+        filename = f"{os.path.splitext(os.path.basename(chinese_file))[0]}.ENG"
+        titles = [
+            self._get_title(chinese_file, chinese_cues),
+            self._get_title(english_file, english_cues),
+        ]
+        title = " / ".join(dict.fromkeys(t for t in titles if t))
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        if _format in ("md", "docx"):
+            content = "\n".join(
+                "".join(
+                    f"{line.strip()}  \n"
+                    for text in chinese + english
+                    for line in text.splitlines()
+                )
+                for chinese, english in rows
+            )
+            document = MarkdownTemplate.render(
+                {"title": title, "timestamp": timestamp, "content": content}
+            )
+            suffix = ".md"
+        elif _format in ("html", "pdf"):
+            content = "".join(
+                "<p> "
+                + "<br>".join(
+                    line.strip()
+                    for text in chinese + english
+                    for line in text.splitlines()
+                )
+                + " </p>"
+                for chinese, english in rows
+            )
+            document = HTMLTemplate.render(
+                {"title": title, "timestamp": timestamp, "content": content}
+            )
+            suffix = ".html"
+        else:
+            if not self.batch_mode:
+                self.console.print(f"[red]双语模式不支持的文件格式: {_format}[/red]")
+            return ""
+
+        if _format in ("md", "html"):
+            target_file = os.path.join(target_path or "", f"{filename}{suffix}")
+            with open(target_file, "w", encoding="utf-8") as file:
+                file.write(document)
+        else:
+            with tempfile.NamedTemporaryFile(
+                mode="w+", encoding="utf-8", delete=False, suffix=suffix
+            ) as temp_file:
+                temp_file.write(document)
+            try:
+                if _format == "docx":
+                    target_file = os.path.join(target_path or "", f"{filename}.docx")
+                    self._markdown_to_docx(temp_file.name, target_file)
+                else:
+                    target_file = self._html_to_pdf(
+                        temp_file.name, target_path or ".", filename
+                    )
+            finally:
+                os.unlink(temp_file.name)
+        if target_file:
+            self._update_catalog(
+                chinese_file, target_file, f"bilingual_{_format}", chinese_cues
+            )
+            self._update_catalog(
+                english_file, target_file, f"bilingual_{_format}", english_cues
+            )
+        if not self.batch_mode:
+            self.console.print(
+                f"[green]{chinese_file} 与 {english_file} 合并为双语{_format}成功[/green]"
+            )
+        return target_file
+
+    def _align_cues(self, primary, secondary):
+        # 以中文字幕为锚点，每条中文字幕一行；英文字幕并入与其重叠最多的那一行，
+        # 不做传递合并。两路都按开始时间排序后双指针扫描，整体为线性
+        primary = sorted(primary)
+        secondary = sorted(secondary)
+        attached = [[] for _ in primary]
+        # orphans[k] 为落在第 k 条中文字幕之前的空档里、没有任何重叠的英文字幕
+        orphans = [[] for _ in range(len(primary) + 1)]
+        i = 0
+        for start, end, text in secondary:
+            while i < len(primary) and primary[i][1] <= start:
+                i += 1
+            best = None
+            best_overlap = 0
+            k = i
+            while k < len(primary) and primary[k][0] < end:
+                overlap = min(primary[k][1], end) - max(primary[k][0], start)
+                if overlap > best_overlap:
+                    best, best_overlap = k, overlap
+                k += 1
+            if best is None:
+                orphans[i].append(text)
+            else:
+                attached[best].append(text)
+
+        rows = []
+        for k, (_, _, text) in enumerate(primary):
+            if orphans[k]:
+                rows.append(([], orphans[k]))
+            rows.append(([text], attached[k]))
+        if orphans[-1]:
+            rows.append(([], orphans[-1]))
+        return rows
+
     def convert(self, source_file, target_path=None, _format=None):
         if _format is None:
             _format = "md"
+        target_file = ""
+        cues = None
         try:
-            match _format:
-                case "md":
-                    self._convert_to_markdown(source_file, target_path)
-                case "docx":
-                    self._convert_to_docx(source_file, target_path)
-                case "html":
-                    self._convert_to_html(source_file, target_path)
-                case "pdf":
-                    self._convert_to_pdf(source_file, target_path)
-                case "txt":
-                    self._convert_to_txt(source_file, target_path)
-                case _:
-                    if not self.batch_mode:
-                        self.console.print(f"[red]不支持的文件格式: {_format}[/red]")
+            # 只读取和解析一次，渲染、索引和目录共用同一份字幕和标题
+            collapse_stats = {}
+            cues = self._read_cues(source_file, collapse_stats)
+            if cues is None:
+                return ""
+            if collapse_stats and not self.batch_mode:
+                self._report_collapse(source_file, collapse_stats)
+            title = self._get_title(source_file, cues)
+            output_file, document = self._render_to(
+                source_file, cues, title, target_path, _format
+            )
+            self._write_document(output_file, document)
+            target_file = output_file
             if not self.batch_mode:
                 self.console.print(f"成功将 {source_file} 转换为 {_format}")
+            self._after_write(source_file, target_file, _format, cues, title)
         except Exception as e:
             self.console.print(f"[red]转换文件 {source_file} 时出错: {str(e)}")
+        finally:
+            self._release_cues(cues)
+        return target_file
+
+    def _update_catalog(
+        self,
+        source_file,
+        output_file,
+        _format,
+        cues=None,
+        title=None,
+        content_hash=None,
+    ):
+        with Catalog(self.catalog_path, self.library_root) as catalog:
+            origin = self._cues_origin(source_file, cues, catalog)
+            if origin != source_file:
+                catalog.add_output(origin, output_file, _format)
+                return
+            if not catalog.is_fresh(source_file):
+                if cues is None:
+                    cues = self._read_cues(source_file) or []
+                catalog.update_source(
+                    source_file,
+                    title or self._get_title(source_file),
+                    self._get_lang_code(os.path.basename(source_file)),
+                    cues,
+                    content_hash or self._file_hash(source_file),
+                )
+            catalog.add_output(source_file, output_file, _format)
+
+    def _cues_origin(self, source_file, cues, db):
+        # 列存文件由原字幕转换而来，原字幕已有记录时归到原字幕名下，
+        # 避免同一份字幕在目录和索引中出现两次
+        if not isinstance(cues, CueStore) or not source_file.lower().endswith(".cues"):
+            return source_file
+        origin = cues.meta.get("path")
+        if not origin:
+            return source_file
+        origin = library_path(origin, self.library_root)
+        return origin if db.contains(origin) else source_file
+
+    def _file_hash(self, source_file):
+        sha1 = hashlib.sha1()
+        with open(source_file, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                sha1.update(chunk)
+        return sha1.hexdigest()
+
+    def query_catalog(self, title=None, language=None, _format=None, as_json=False):
+        if not os.path.exists(self.catalog_path):
+            self.console.print("[red]未找到目录文件，请先运行 convert 命令[/red]")
+            return []
+
+        with Catalog(self.catalog_path, self.library_root) as catalog:
+            entries = catalog.query(title, language, _format)
+
+        for entry in entries:
+            if as_json:
+                print(json.dumps(entry, ensure_ascii=False))
+                continue
+            runtime = datetime.timedelta(seconds=entry["runtime_ms"] // 1000)
+            self.console.print(
+                f"[blue][b]{escape(str(entry['title']))}[/b][/blue] "
+                f"({entry['language']}) {entry['cue_count']} 条字幕 {runtime} "
+                f"[dim]{escape(entry['source'])}[/dim]"
+            )
+            for output in entry["outputs"]:
+                self.console.print(
+                    f"  [green]{output['format']}[/green] {escape(output['output'])}"
+                )
+        if not as_json:
+            self.console.print(f"[green]共 {len(entries)} 个字幕文件")
+        return entries
+
+    def catalog_sources(self, title=None, language=None, _format=None):
+        if not os.path.exists(self.catalog_path):
+            self.console.print("[red]未找到目录文件，请先运行 convert 命令[/red]")
+            return []
+
+        with Catalog(self.catalog_path, self.library_root) as catalog:
+            entries = catalog.query(title, language, _format)
+        return [
+            entry["source"] for entry in entries if os.path.exists(entry["source"])
+        ]
+
+    def _run_convert_pipeline(self, source_files, target_path, _format, on_done):
+        # PDF 渲染线程共用一组常驻浏览器，避免每个文件都启动一次 Chromium
+        keep_browser = _format == "pdf" and self.page_pool is None
+        if keep_browser:
+            self.keep_browser()
+
+        collapsed = {"files": 0, "lines": 0, "bytes": 0}
+
+        def on_result(job):
+            # 折叠结果在调用线程中逐个汇报，进度条之上不会被打乱，结束后再汇总一次
+            if job["collapse"]:
+                self._report_collapse(job["source"], job["collapse"])
+                collapsed["files"] += 1
+                collapsed["lines"] += job["collapse"]["lines"]
+                collapsed["bytes"] += job["collapse"]["bytes"]
+            self._release_cues(job["cues"])
+            on_done(job["source"], True)
+
+        def on_error(job, stage, error):
+            self.console.print(f"[red]转换文件 {job['source']} 时出错: {str(error)}")
+            self._release_cues(job.get("cues"))
+            # 失败的文件不记入断点，续传时会重试
+            on_done(job["source"], False)
+
+        try:
+            Pipeline(self._convert_stages(target_path, _format), self.queue_size).run(
+                ({"source": source_file} for source_file in source_files),
+                on_result,
+                on_error,
+            )
+        finally:
+            if keep_browser:
+                self.quit_browser()
+        if collapsed["files"]:
+            self.console.print(
+                f"[dim]已折叠 {collapsed['files']} 个滚动字幕文件: "
+                f"减少 {collapsed['lines']} 行, {collapsed['bytes']} 字节[/dim]"
+            )
+
+    def _convert_stages(self, target_path, _format):
+        def read(job):
+            # 列存文件在解析阶段通过 mmap 读取
+            if not job["source"].lower().endswith(".cues"):
+                with open(job["source"], "rb") as file:
+                    job["raw"] = file.read()
+            return job
+
+        def parse(job):
+            job["collapse"] = {}
+            if "raw" in job:
+                raw_data = job.pop("raw")
+                job["hash"] = hashlib.sha1(raw_data).hexdigest()
+                job["cues"] = self._parse_cues(
+                    job["source"], raw_data, job["collapse"]
+                )
+            else:
+                job["cues"] = self._read_cues(job["source"])
+            if job["cues"] is None:
+                raise ValueError("无法解析字幕文件")
+            return job
+
+        def title(job):
+            job["title"] = self._get_title(job["source"], job["cues"])
+            return job
+
+        def render(job):
+            job["target"], job["document"] = self._render_to(
+                job["source"], job["cues"], job["title"], target_path, _format
+            )
+            return job
+
+        def write(job):
+            self._write_document(job["target"], job.pop("document"))
+            self._after_write(
+                job["source"],
+                job["target"],
+                _format,
+                job["cues"],
+                job["title"],
+                job.get("hash"),
+            )
+            return job
+
+        return [
+            Stage("read", read, self.stage_workers["read"]),
+            Stage("parse", parse, self.stage_workers["parse"]),
+            Stage("title", title, self.stage_workers["title"]),
+            Stage("render", render, self.stage_workers["render"]),
+            Stage("write", write, self.stage_workers["write"]),
+        ]
+
+    def compile(self, source_files, target_file, _format="pdf", name=None):
+        self.batch_mode = True
+        entries = []
+
+        with self.progress:
+            task = self.progress.add_task(
+                "[blue]📚 汇编字幕...", total=len(source_files), filename=""
+            )
+
+            for source_file in source_files:
+                self.progress.update(
+                    task, filename=f"正在处理: {os.path.basename(source_file)}"
+                )
+                cues = self._read_cues(source_file)
+                if cues:
+                    title = self._get_title(source_file, cues) or os.path.basename(
+                        source_file
+                    )
+                    entries.append((source_file, title, cues))
+                self.progress.advance(task)
+
+        self.batch_mode = False
+        if not entries:
+            self.console.print("[red]没有可以汇编的字幕文件[/red]")
+            return ""
+
+        try:
+            # 所有字幕拼成一个带目录的文档，只调用一次 pandoc 或 Chromium
+            name = name or os.path.splitext(os.path.basename(target_file))[0]
+            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if _format in ("md", "docx"):
+                sections = "\n".join(
+                    f'<a id="part-{i}"></a>\n\n## {title}\n\n'
+                    + self._markdown_content(cues)
+                    for i, (_, title, cues) in enumerate(entries, 1)
+                )
+                # docx 由 pandoc 生成目录
+                if _format == "md":
+                    toc = "\n".join(
+                        f"{i}. [{title}](#part-{i})"
+                        for i, (_, title, _) in enumerate(entries, 1)
+                    )
+                    sections = f"## 目录\n\n{toc}\n\n{sections}"
+                document = MarkdownTemplate.render(
+                    {"title": name, "timestamp": timestamp, "content": sections}
+                )
+                suffix = ".md"
+            elif _format in ("html", "pdf"):
+                toc = "".join(
+                    f'<li><a href="#part-{i}">{html.escape(title)}</a></li>'
+                    for i, (_, title, _) in enumerate(entries, 1)
+                )
+                sections = "".join(
+                    f'<section id="part-{i}" style="break-before: page">'
+                    f"<h2>{html.escape(title)}</h2>{self._html_content(cues)}</section>"
+                    for i, (_, title, cues) in enumerate(entries, 1)
+                )
+                document = HTMLTemplate.render(
+                    {
+                        "title": name,
+                        "timestamp": timestamp,
+                        "content": f"<nav><h2>目录</h2><ol>{toc}</ol></nav>{sections}",
+                    }
+                )
+                suffix = ".html"
+            else:
+                self.console.print(f"[red]汇编不支持的文件格式: {_format}[/red]")
+                return ""
+
+            if _format in ("md", "html"):
+                with open(target_file, "w", encoding="utf-8") as file:
+                    file.write(document)
+            else:
+                with tempfile.NamedTemporaryFile(
+                    mode="w+", encoding="utf-8", delete=False, suffix=suffix
+                ) as temp_file:
+                    temp_file.write(document)
+                try:
+                    if _format == "docx":
+                        self._markdown_to_docx(temp_file.name, target_file, toc=True)
+                    else:
+                        target_file = self._html_to_pdf(
+                            temp_file.name,
+                            os.path.dirname(target_file) or ".",
+                            os.path.splitext(os.path.basename(target_file))[0],
+                        )
+                finally:
+                    os.unlink(temp_file.name)
+            if not target_file:
+                return ""
+
+            for source_file, title, cues in entries:
+                self._update_catalog(
+                    source_file, target_file, f"compile_{_format}", cues, title
+                )
+            self.console.print(
+                f"[green]🎉 已将 {len(entries)} 个字幕汇编为 {target_file}[/green]"
+            )
+            return target_file
+        finally:
+            for _, _, cues in entries:
+                self._release_cues(cues)
+
+    def batch_bilingual(self, source_files, target_path, _format, resume=False):
+        self.batch_mode = True
+        task_id = f"bilingual_{_format}"
+        completed_files = self.load_task_state(task_id) if resume else []
+        pairs = self._shard_files(
+            self._pair_bilingual(source_files), key=lambda pair: pair[0]
+        )
+
+        with self.progress:
+            task = self.progress.add_task(
+                f"[blue]🌐 生成双语 {_format}...", total=len(pairs), filename=""
+            )
+
+            generated = 0
+            for chinese_file, english_file in pairs:
+                self.progress.update(
+                    task, filename=f"正在处理: {os.path.basename(chinese_file)}"
+                )
+                if chinese_file in completed_files:
+                    self.progress.advance(task)
+                    continue
+
+                try:
+                    target_file = self._convert_to_bilingual(
+                        chinese_file, english_file, target_path, _format
+                    )
+                except Exception as e:
+                    target_file = ""
+                    self.console.print(
+                        f"[red]生成双语文件 {chinese_file} 时出错: {str(e)}[/red]"
+                    )
+                # 只有真正生成了文件才记入断点，失败的下次续传时会重试
+                if target_file:
+                    generated += 1
+                    completed_files.append(chinese_file)
+                    self.save_task_state(task_id, completed_files)
+
+                self.progress.advance(task)
+        self.batch_mode = False
+        self.console.print(f"[green]🎉 共生成 {generated} 个双语文件。")
+
+    def _pair_bilingual(self, source_files):
+        pairs = []
+        for group in self._group_by_base(source_files).values():
+            lang_files = defaultdict(list)
+            for file in group:
+                lang_files[self._get_lang_code(os.path.basename(file))].append(file)
+            chinese_file = self._pick_track(lang_files["CHS"]) or self._pick_track(
+                lang_files["CHT"]
+            )
+            english_file = self._pick_track(lang_files["ENG"])
+            if chinese_file and english_file:
+                pairs.append((chinese_file, english_file))
+        return pairs
+
+    def _pick_track(self, files):
+        # 强制字幕只有部分台词，不参与合并；优先选择不带 SDH/CC 等后缀的完整字幕，
+        # 否则与 clean 一样保留最大的文件
+        files = [
+            f
+            for f in files
+            if not re.search(r"\.FORCED(\.|$)", os.path.splitext(f)[0], re.I)
+        ]
+        exact = [
+            f for f in files if re.search(r"\.(CHS|CHT|ENG)$", os.path.splitext(f)[0])
+        ]
+        if exact:
+            return min(exact)
+        if files:
+            return max(files, key=os.path.getsize)
+        return None
+
+    def _group_by_base(self, files):
+        # 按去掉语言后缀的文件名分组，如 foo.CHS.srt 和 foo.ENG.srt 同属 foo
+        groups = defaultdict(list)
+        for file in files:
+            name, ext = os.path.splitext(file)
+            base_name = re.sub(r"\.(CHS|CHT|ENG|CC|FORCED|SDH).*$", "", name)
+            groups[base_name].append(file)
+        return groups
 
     def clean(self, input_folder, resume=False):
         self.batch_mode = True
@@ -679,22 +1518,7 @@ class Toolbox:
             self.progress.update(
                 task, filename=f"[magenta]正在处理: {input_folder}[/magenta]"
             )
-
-            files = [
-                f
-                for f in os.listdir(input_folder)
-                if os.path.isfile(os.path.join(input_folder, f))
-            ]
-            groups = defaultdict(list)
-
-            for file in files:
-                name, ext = os.path.splitext(file)
-                base_name = re.sub(r"\.(CHS|CHT|ENG|CC|FORCED|SDH).*$", "", name)
-                groups[base_name].append(file)
-
-            for base_name, group in groups.items():
-                if len(group) > 1:
-                    self._clean_group(input_folder, group)
+            self.clean_folder(input_folder)
 
             completed_folders.append(input_folder)
             self.save_task_state(task_id, completed_folders)
@@ -702,8 +1526,23 @@ class Toolbox:
 
         self.batch_mode = False
 
+    def clean_folder(self, input_folder):
+        files = [
+            f
+            for f in os.listdir(input_folder)
+            if os.path.isfile(os.path.join(input_folder, f))
+        ]
+        groups = self._group_by_base(files)
+
+        removed_files = []
+        for base_name, group in groups.items():
+            if len(group) > 1:
+                removed_files.extend(self._clean_group(input_folder, group))
+        return removed_files
+
     def _clean_group(self, folder, group):
         lang_files = {"CHS": [], "CHT": [], "ENG": [], "Unknown": []}
+        removed_files = []
 
         for file in group:
             lang = self._get_lang_code(file)
@@ -718,19 +1557,46 @@ class Toolbox:
                 for file in files:
                     if file != largest_file:
                         os.remove(os.path.join(folder, file))
+                        self._remove_records(os.path.join(folder, file))
+                        removed_files.append(file)
                         self.console.print(f"[red]删除文件: {file}[/red]")
+        return removed_files
 
     def _get_lang_code(self, filename):
         match = re.search(r"\.(CHS|CHT|ENG)", filename)
         return match.group(1) if match else "Unknown"
 
 
+def parse_shard(value):
+    match = re.fullmatch(r"(\d+)/(\d+)", value)
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise argparse.ArgumentTypeError(f"分片格式应为 i/N 且 1 <= i <= N: {value}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def parse_workers(value):
+    workers = {}
+    for item in value.split(","):
+        match = re.fullmatch(r"(read|parse|title|render|write)=(\d+)", item.strip())
+        if not match or int(match.group(2)) < 1:
+            raise argparse.ArgumentTypeError(
+                f"格式应为 阶段=线程数，阶段可选 read/parse/title/render/write: {item}"
+            )
+        workers[match.group(1)] = int(match.group(2))
+    return workers
+
+
 def main():
-    console = Console()
+    # 横幅和提示写到 stderr，stdout 只留给命令的输出，例如 catalog --json
+    console = Console(stderr=True)
     console.print(banner)
     console.print("👋 欢迎使用字幕工具箱 CLI", style="bold blue")
     console.print("❓ 使用 -h 或 --help 查看帮助信息\n", style="bold blue")
     parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--root",
+        help="字幕库根目录，目录和索引中的路径相对于它记录，默认为当前目录",
+    )
     subparsers = parser.add_subparsers(dest="action")
 
     # 解压命令
@@ -740,6 +1606,9 @@ def main():
     )
     unzip_parser.add_argument("-o", "--output", required=True, help="输出目录")
     unzip_parser.add_argument("-r", "--resume", action="store_true", help="断点续传")
+    unzip_parser.add_argument(
+        "--shard", type=parse_shard, help="只处理第 i 个分片，格式为 i/N"
+    )
 
     # 转换命令
     convert_parser = subparsers.add_parser(
@@ -752,11 +1621,32 @@ def main():
     convert_parser.add_argument(
         "-f",
         "--format",
-        choices=["md", "docx", "html", "pdf", "txt"],
+        choices=["md", "docx", "html", "pdf", "txt", "cues"],
         default="md",
         help="转换格式",
     )
     convert_parser.add_argument("-r", "--resume", action="store_true", help="断点续传")
+    convert_parser.add_argument(
+        "--shard", type=parse_shard, help="只处理第 i 个分片，格式为 i/N"
+    )
+    convert_parser.add_argument(
+        "-w",
+        "--workers",
+        type=parse_workers,
+        help="流水线各阶段的线程数，如 title=8,render=4",
+    )
+    convert_parser.add_argument(
+        "--collapse",
+        choices=["auto", "on", "off"],
+        default="auto",
+        help="折叠滚动字幕中重复的行，auto 只处理 CC 字幕",
+    )
+    convert_parser.add_argument(
+        "-b",
+        "--bilingual",
+        action="store_true",
+        help="将同名的中英文字幕按时间轴合并为双语文件（支持 md/docx/html/pdf）",
+    )
 
     # 重命名命令
     rename_parser = subparsers.add_parser(
@@ -766,6 +1656,9 @@ def main():
         "-i", "--input", nargs="+", required=True, help="输入文件或目录"
     )
     rename_parser.add_argument("-r", "--resume", action="store_true", help="断点续传")
+    rename_parser.add_argument(
+        "--shard", type=parse_shard, help="只处理第 i 个分片，格式为 i/N"
+    )
 
     # 清理命令
     clean_parser = subparsers.add_parser(
@@ -783,15 +1676,113 @@ def main():
     diff_parser.add_argument(
         "-f",
         "--format",
-        choices=["md", "docx", "html", "pdf", "txt"],
+        choices=["md", "docx", "html", "pdf", "txt", "cues"],
         default="md",
         help="转换格式",
     )
     diff_parser.add_argument("-r", "--resume", action="store_true", help="断点续传")
+    diff_parser.add_argument(
+        "--shard", type=parse_shard, help="只处理第 i 个分片，格式为 i/N"
+    )
+    diff_parser.add_argument(
+        "-w",
+        "--workers",
+        type=parse_workers,
+        help="流水线各阶段的线程数，如 title=8,render=4",
+    )
+    diff_parser.add_argument(
+        "--collapse",
+        choices=["auto", "on", "off"],
+        default="auto",
+        help="折叠滚动字幕中重复的行，auto 只处理 CC 字幕",
+    )
+
+    # 合并分片断点命令
+    subparsers.add_parser(
+        "merge-state", aliases=["ms"], help="合并各分片的断点文件并统计结果"
+    )
+
+    # 索引命令
+    index_parser = subparsers.add_parser(
+        "index", aliases=["ix"], help="为字幕建立全文检索索引"
+    )
+    index_parser.add_argument(
+        "-i", "--input", nargs="+", required=True, help="输入文件或目录"
+    )
+
+    # 搜索命令
+    search_parser = subparsers.add_parser(
+        "search", aliases=["s"], help="在字幕索引中搜索台词"
+    )
+    search_parser.add_argument("query", help="要搜索的台词")
+    search_parser.add_argument(
+        "-n", "--limit", type=int, default=20, help="最多显示的结果数"
+    )
+
+    # 汇编命令
+    compile_parser = subparsers.add_parser(
+        "compile", aliases=["cp"], help="将多个字幕汇编为一个带目录的文档"
+    )
+    compile_parser.add_argument(
+        "-i", "--input", nargs="+", help="输入文件或目录，不指定时从目录中查询"
+    )
+    compile_parser.add_argument("-t", "--title", help="按标题筛选目录中的字幕")
+    compile_parser.add_argument(
+        "-l", "--lang", choices=["CHS", "CHT", "ENG", "Unknown"], help="按语言筛选"
+    )
+    compile_parser.add_argument("-o", "--output", required=True, help="输出文件")
+    compile_parser.add_argument(
+        "-f",
+        "--format",
+        choices=["md", "docx", "html", "pdf"],
+        default="pdf",
+        help="输出格式",
+    )
+    compile_parser.add_argument("-n", "--name", help="文档标题，默认为输出文件名")
+
+    # 目录查询命令
+    catalog_parser = subparsers.add_parser(
+        "catalog", aliases=["ca"], help="查询已处理字幕的目录"
+    )
+    catalog_parser.add_argument("-t", "--title", help="按标题筛选（模糊匹配）")
+    catalog_parser.add_argument(
+        "-l", "--lang", choices=["CHS", "CHT", "ENG", "Unknown"], help="按语言筛选"
+    )
+    catalog_parser.add_argument("-f", "--format", help="只列出已转换为该格式的字幕")
+    catalog_parser.add_argument(
+        "--json", action="store_true", help="以 JSON Lines 格式输出"
+    )
+
+    # 服务命令
+    serve_parser = subparsers.add_parser(
+        "serve", aliases=["sv"], help="以常驻服务方式提供本地 HTTP 接口"
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    serve_parser.add_argument("-p", "--port", type=int, default=8765, help="监听端口")
+    serve_parser.add_argument(
+        "-w", "--workers", type=int, default=2, help="同时处理的请求数"
+    )
+    serve_parser.add_argument(
+        "-q", "--queue-size", type=int, default=32, help="等待队列的最大长度"
+    )
 
     args = parser.parse_args()
+    if getattr(args, "bilingual", False) and args.format not in [
+        "md",
+        "docx",
+        "html",
+        "pdf",
+    ]:
+        parser.error(f"双语模式只支持 md/docx/html/pdf 格式，不支持 {args.format}")
 
     toolbox = Toolbox()
+    toolbox.library_root = args.root
+    if getattr(args, "shard", None):
+        toolbox.set_shard(*args.shard)
+    if getattr(args, "workers", None) and args.action not in ["serve", "sv"]:
+        toolbox.stage_workers.update(args.workers)
+    if getattr(args, "collapse", None):
+        toolbox.collapse = args.collapse
 
     try:
         if args.action in ["unzip", "u"]:
@@ -816,18 +1807,52 @@ def main():
                         [
                             os.path.join(input_path, f)
                             for f in os.listdir(input_path)
-                            if f.endswith((".vtt", ".srt", ".ass"))
+                            if f.endswith((".vtt", ".srt", ".ass", ".cues"))
                         ]
                     )
                 else:
                     source_files.append(input_path)
-            toolbox.batch_convert(source_files, args.output, args.format, args.resume)
+            if args.bilingual:
+                toolbox.batch_bilingual(
+                    source_files, args.output, args.format, args.resume
+                )
+            else:
+                toolbox.batch_convert(
+                    source_files, args.output, args.format, args.resume
+                )
         elif args.action in ["rename", "r"]:
             toolbox.batch_rename(args.input, args.resume)
         elif args.action in ["clean", "cl"]:
             toolbox.clean(args.input, args.resume)
         elif args.action in ["diff", "d"]:
             toolbox.diff(args.input, args.output, args.format, args.resume)
+        elif args.action in ["merge-state", "ms"]:
+            toolbox.merge_state()
+        elif args.action in ["compile", "cp"]:
+            if args.input:
+                source_files = sorted(
+                    toolbox._collect_subtitles(
+                        args.input, (".vtt", ".srt", ".ass", ".cues")
+                    )
+                )
+            else:
+                source_files = toolbox.catalog_sources(args.title, args.lang)
+            toolbox.compile(source_files, args.output, args.format, args.name)
+        elif args.action in ["catalog", "ca"]:
+            toolbox.query_catalog(args.title, args.lang, args.format, args.json)
+        elif args.action in ["serve", "sv"]:
+            from server import ToolboxServer
+
+            server = ToolboxServer(
+                toolbox, args.host, args.port, args.workers, args.queue_size
+            )
+            host, port = server.address
+            console.print(f"🚀 服务已启动: http://{host}:{port}", style="bold green")
+            server.serve_forever()
+        elif args.action in ["index", "ix"]:
+            toolbox.build_index(args.input)
+        elif args.action in ["search", "s"]:
+            toolbox.search(args.query, args.limit)
     except KeyboardInterrupt:
         console.print("\n👋 程序已退出，Bye！", style="bold yellow")
     except Exception as e: